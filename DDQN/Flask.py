@@ -60,7 +60,8 @@ def run_ddqn():
     请求格式:
     {
         "algorithm_name": "ddqn",
-        "params": [10,5,8,6,7,9,6,7,6,7,7,7,4,7,5]
+        "params": [10,5,8,6,7,9,6,7,6,7,7,7,4,7,5],
+        "profile": false          # 可选，true/"cprofile"/"pyinstrument" 时剖析本次运行
     }
     """
     try:
@@ -81,7 +82,7 @@ def run_ddqn():
         algorithm_name = input_data['algorithm_name']
         params = input_data['params']
 
-        result = run_algorithm(algorithm_name, params)
+        result = run_algorithm(algorithm_name, params, profile=input_data.get('profile'))
 
         # 3. 处理并返回结果
         processed_result = {
@@ -97,13 +98,14 @@ def run_ddqn():
         return jsonify({"error": str(e)}), 500
 
 
-def run_algorithm(algorithm_name: str, input_data: List[float]) -> Dict[str, Any]:
+def run_algorithm(algorithm_name: str, input_data: List[float], profile=None) -> Dict[str, Any]:
     """
     执行指定算法
 
     Args:
         algorithm_name: 算法名称 (如 'ddqn')
         input_data: 输入参数列表
+        profile: 剖析开关（None时由环境变量DDQN_PROFILE决定）
 
     Returns:
         算法执行结果字典
@@ -142,7 +144,7 @@ def run_algorithm(algorithm_name: str, input_data: List[float]) -> Dict[str, Any
             print(f"  {wp_name}: {step_count} 个工序" + ("（使用标准模板）" if step_count == 0 else ""))
         
         # 运行调度算法（不重复保存工序到数据库）
-        result = RUN(workpoints_data, save_processes_to_db=False)
+        result = RUN(workpoints_data, save_processes_to_db=False, profile=profile)
         
         # 检查返回值
         if result is None:
@@ -151,9 +153,9 @@ def run_algorithm(algorithm_name: str, input_data: List[float]) -> Dict[str, Any
         if isinstance(result, tuple) and len(result) == 2 and result[0] is None:
             raise RuntimeError("Algorithm execution failed - returned None result")
         
-        if isinstance(result, tuple) and len(result) == 4:
-            # RUN函数返回: record, process_fig, workpoint_fig, team_fig
-            record, process_fig, workpoint_fig, team_fig = result
+        if isinstance(result, tuple) and len(result) == 5:
+            # RUN函数返回: record, process_fig, workpoint_fig, team_fig, timings
+            record, process_fig, workpoint_fig, team_fig, timings = result
             
             # 转换所有图像缓冲区为base64
             images = {}
@@ -187,7 +189,8 @@ def run_algorithm(algorithm_name: str, input_data: List[float]) -> Dict[str, Any
                     "process": "工序视角甘特图 - 按工序顺序显示调度方案",
                     "workpoint": "工作点视角甘特图 - 按工作点分组显示任务分配",
                     "team": "团队视角甘特图 - 按团队分组显示工作负载"
-                }
+                },
+                "timings": timings
             }
         else:
             raise RuntimeError(f"Unexpected return format from RUN function: {type(result)}, length: {len(result) if isinstance(result, tuple) else 'N/A'}")
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+动作目录模块 - 把环境的候选动作映射到每个问题固定的动作槽位
+
+DDQN网络为目录中的每个槽位输出一个Q值，有效动作用布尔掩码表示，
+因此动作选择和DDQN目标值都是一次带掩码的argmax，不受候选动作数量的限制。
+
+槽位布局（工序下标i）:
+    单个启动 (i, workers) / 按时启动 ("start_at", (i, workers, start)):
+        single_offsets[i] + workers - 1，每个(工序, 人数)固定对应一个槽位，
+        工序i的槽位数为其团队规模（人数上限）
+    批量启动 ("batch_start", ((i1, w1), (i2, w2), ...)):
+        batch_base + k，每个分配方案（工序组合, 各工序人数）固定对应一个槽位。创建目录时
+        对每个并行工序组（同一工作点、团队、order）的每个至少两个工序的子集和每个可用人数，
+        按环境的batch_allocation_schemes枚举全部可能的分配方案，k为方案在枚举结果中的序号
+    推进时间 ("advance_time", 0):
+        最后一个槽位
+人数超过团队规模或不在枚举结果中的动作映射为-1（不可选）。
+"""
+
+from itertools import combinations
+
+import numpy as np
+
+
+class ActionCatalogue:
+    """一个问题的固定动作目录"""
+
+    def __init__(self, worker_limits, batch_allocations=()):
+        """
+        Args:
+            worker_limits: 每个工序可分配的最大人数（所属团队的规模）
+            batch_allocations: 全部可能的批量分配方案，每个为((工序下标, 人数), ...)元组
+        """
+        self.worker_limits = np.asarray(worker_limits, dtype=np.int64)
+        self.num_steps = len(self.worker_limits)
+        self.single_offsets = np.concatenate([[0], np.cumsum(self.worker_limits)[:-1]]).astype(np.int64)
+        self.batch_base = int(self.worker_limits.sum())
+        self.batch_slots = {}
+        for allocation in batch_allocations:
+            self.batch_slots.setdefault(tuple(allocation), self.batch_base + len(self.batch_slots))
+        self.advance_slot = self.batch_base + len(self.batch_slots)
+        self.size = self.advance_slot + 1
+
+    @classmethod
+    def for_env(cls, env):
+        """为环境的问题创建动作目录（每个工序的人数上限为所属团队的规模）"""
+        return cls(env.team_sizes[env.step_team], cls.enumerate_batch_allocations(env))
+
+    @staticmethod
+    def enumerate_batch_allocations(env):
+        """
+        枚举环境可能生成的全部批量分配方案
+
+        get_valid_actions只对当前可用的并行工序生成批量方案，因此对每个并行工序组枚举
+        至少两个工序的子集（保持工序下标升序）和0..团队规模的每个可用人数。
+        """
+        allocations = []
+        groups = env.get_parallel_step_groups(range(len(env.work_steps)))
+        for group in groups.values():
+            team_size = env.team_sizes[env.step_team[group[0]]].item()
+            for k in range(2, len(group) + 1):
+                for step_ids in combinations(sorted(group), k):
+                    for available_workers in range(team_size + 1):
+                        allocations.extend(
+                            tuple(allocation) for allocation in
+                            env.batch_allocation_schemes(step_ids, available_workers, team_size)
+                        )
+        return allocations
+
+    def encode(self, valid_actions):
+        """
+        把有效动作列表映射为槽位
+
+        Returns:
+            与valid_actions对齐的int64槽位数组，超出目录的动作为-1
+        """
+        slots = np.empty(len(valid_actions), dtype=np.int64)
+        for k, (kind, payload) in enumerate(valid_actions):
+            if kind == "advance_time":
+                slots[k] = self.advance_slot
+            elif kind == "batch_start":
+                slots[k] = self.batch_slots.get(tuple(payload), -1)
+            else:
+                i, workers = payload[:2] if kind == "start_at" else (kind, payload)
+                in_range = 1 <= workers <= self.worker_limits[i]
+                slots[k] = self.single_offsets[i] + workers - 1 if in_range else -1
+        return slots
+
+    def mask(self, slots_list):
+        """
+        由每行的槽位数组生成(B, size)布尔掩码（-1忽略）
+        """
+        masks = np.zeros((len(slots_list), self.size), dtype=bool)
+        if len(slots_list):
+            rows = np.repeat(np.arange(len(slots_list)), [len(slots) for slots in slots_list])
+            cols = np.concatenate(slots_list)
+            keep = cols >= 0
+            masks[rows[keep], cols[keep]] = True
+        return masks
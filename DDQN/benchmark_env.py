@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+调度环境性能基准 - 测量FactoryEnvironment的核心仿真吞吐量
+
+对不同规模的生成问题，分别用随机策略、贪婪策略和回放(录制的贪婪动作序列)驱动环境，
+统计 reset/秒、环境步/秒、get_valid_actions 延迟分位数和进程峰值内存，
+另测 snapshot/restore/clone 相对 deepcopy 的开销。结果写入JSON文件，便于跨版本对比。
+完全离线运行，不需要MySQL。
+
+用法:
+    python benchmark_env.py                             # 默认 3 / 30 / 300 / 3000 个工作点
+    python benchmark_env.py --sizes 3 30                # 指定工作点数量
+    python benchmark_env.py --output bench.json         # 指定结果文件（默认写入result目录）
+    python benchmark_env.py --compare old.json          # 与之前的结果对比
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from config import ENVIRONMENT_CONFIG, FILE_PATHS, get_result_path
+from scheduling_environment import FactoryEnvironment
+from greedy_algorithm import GreedyScheduler
+from workpoint_generator import generate_workpoints_data
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块
+    resource = None
+
+
+DEFAULT_SIZES = (3, 30, 300, 3000)
+POLICIES = ("random", "greedy", "replay")
+BENCHMARK_DURATIONS = {"type": "uniform_int", "low": 3, "high": 12}
+
+
+def make_benchmark_workpoints(num_workpoints, seed=0):
+    """生成用于基准测试的工作点数据（工序随机选自标准模板，持续时间为3~12的整数）"""
+    return generate_workpoints_data(num_workpoints, seed, duration_distribution=BENCHMARK_DURATIONS)
+
+
+def build_quiet_env(workpoints_data):
+    """创建环境并屏蔽初始化时的逐工作点输出"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return FactoryEnvironment(workpoints_data)
+
+
+def peak_rss_mb():
+    """进程至今的峰值常驻内存（MB），不支持的平台返回None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentiles_us(samples):
+    """延迟样本(秒)的分位数统计（微秒）"""
+    if not samples:
+        return None
+    values = np.asarray(samples) * 1e6
+    return {
+        "count": len(samples),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def _make_chooser(policy, env, seed):
+    """返回按策略从有效动作中选择动作的函数"""
+    if policy == "random":
+        rng = random.Random(seed)
+        return lambda valid_actions: valid_actions[rng.randrange(len(valid_actions))]
+    scheduler = GreedyScheduler(env)
+    return scheduler._select_greedy_action
+
+
+def run_policy(env, policy, episodes, max_actions, seed=0):
+    """
+    用随机或贪婪策略运行若干episode
+
+    Returns:
+        (统计结果字典, 第一个episode的动作序列)
+    """
+    choose = _make_chooser(policy, env, seed)
+    latencies = []
+    total_actions = 0
+    completed = 0
+    makespans = []
+    first_actions = None
+    elapsed = 0.0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for episode in range(episodes):
+            env.reset()
+            actions = []
+            done = False
+            start = time.perf_counter()
+            while not done and len(actions) < max_actions:
+                t0 = time.perf_counter()
+                valid_actions = env.get_valid_actions()
+                latencies.append(time.perf_counter() - t0)
+                if not valid_actions:
+                    break
+                action = choose(valid_actions)
+                if action is None:
+                    break
+                _, _, done = env.step(action)
+                actions.append(action)
+            elapsed += time.perf_counter() - start
+
+            total_actions += len(actions)
+            if done:
+                completed += 1
+                makespans.append(env.get_makespan())
+            if first_actions is None:
+                first_actions = actions
+
+    return {
+        "episodes": episodes,
+        "actions": total_actions,
+        "completed_episodes": completed,
+        "mean_makespan": float(np.mean(makespans)) if makespans else None,
+        "steps_per_sec": total_actions / elapsed if elapsed > 0 else None,
+        "valid_actions_us": _percentiles_us(latencies),
+    }, first_actions
+
+
+def run_replay(env, actions, repeats):
+    """回放录制的动作序列（不调用get_valid_actions），测量纯step()吞吐量"""
+    elapsed = 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            env.reset()
+            start = time.perf_counter()
+            for action in actions:
+                env.step(action)
+            elapsed += time.perf_counter() - start
+    total_actions = repeats * len(actions)
+    return {
+        "episodes": repeats,
+        "actions": total_actions,
+        "steps_per_sec": total_actions / elapsed if elapsed > 0 else None,
+        "valid_actions_us": None,
+    }
+
+
+def measure_resets(env, min_time=0.2, max_resets=1000):
+    """重复reset()，返回每秒reset次数"""
+    count = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while count < max_resets and (count == 0 or elapsed < min_time):
+        env.reset()
+        count += 1
+        elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed > 0 else None
+
+
+def _time_per_call(func, repeats):
+    """多次调用func，返回平均每次耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def benchmark_snapshot(env, actions, repeats):
+    """在episode中途对比snapshot()/restore()/clone()与copy.deepcopy的开销（微秒/次）"""
+    env.reset()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for action in actions[:len(actions) // 2]:
+            env.step(action)
+
+    snapshot = env.snapshot()
+    return {
+        "snapshot_us": _time_per_call(env.snapshot, repeats),
+        "restore_us": _time_per_call(lambda: env.restore(snapshot), repeats),
+        "clone_us": _time_per_call(env.clone, repeats),
+        "deepcopy_us": _time_per_call(lambda: copy.deepcopy(env), max(1, repeats // 10)),
+    }
+
+
+def benchmark_size(num_workpoints, episodes=None, max_actions=None, seed=0):
+    """对一个问题规模运行全部基准，返回结果字典"""
+    # 大规模问题的单个episode很长，限制episode数和每个episode的动作数
+    if episodes is None:
+        episodes = 3 if num_workpoints <= 30 else 1
+    if max_actions is None:
+        max_actions = 5000 if num_workpoints <= 30 else (1000 if num_workpoints <= 300 else 300)
+    repeats = 100 if num_workpoints <= 30 else 10
+
+    start = time.perf_counter()
+    env = build_quiet_env(make_benchmark_workpoints(num_workpoints, seed=seed))
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    result = {
+        "workpoints": num_workpoints,
+        "steps": len(env.work_steps),
+        "build_ms": build_ms,
+        "resets_per_sec": measure_resets(env),
+        "policies": {},
+    }
+
+    result["policies"]["random"], _ = run_policy(env, "random", episodes, max_actions, seed)
+    result["policies"]["greedy"], greedy_actions = run_policy(env, "greedy", episodes, max_actions, seed)
+    result["policies"]["replay"] = run_replay(env, greedy_actions, episodes)
+    result["branching"] = benchmark_snapshot(env, greedy_actions, repeats)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, episodes=None, max_actions=None, seed=0):
+    """运行所有规模的基准，返回可写入JSON的结果"""
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "schedule_mode": ENVIRONMENT_CONFIG["schedule_mode"],
+            "cache_valid_actions": ENVIRONMENT_CONFIG["cache_valid_actions"],
+            "seed": seed,
+        },
+        "results": [benchmark_size(n, episodes, max_actions, seed) for n in sizes],
+    }
+
+
+def _format(value, spec):
+    """格式化数值，None按同样宽度显示为"-" """
+    if value is None:
+        return format("-", ">" + spec.lstrip(">").split(".")[0])
+    return format(value, spec)
+
+
+def print_report(report):
+    """打印基准结果表"""
+    print("=" * 96)
+    print("环境吞吐量 (步/秒) 与 get_valid_actions 延迟 (微秒)")
+    print("=" * 96)
+    print(f"{'工作点':>6} {'工序':>7} {'reset/秒':>10} {'策略':>8} {'动作数':>8} {'步/秒':>10} "
+          f"{'p50':>9} {'p90':>9} {'p99':>9} {'峰值MB':>8}")
+    for result in report["results"]:
+        for policy in POLICIES:
+            stats = result["policies"][policy]
+            latency = stats["valid_actions_us"] or {}
+            print(f"{result['workpoints']:>6} {result['steps']:>7} {_format(result['resets_per_sec'], '>10.1f')} "
+                  f"{policy:>8} {stats['actions']:>8} {_format(stats['steps_per_sec'], '>10.1f')} "
+                  f"{_format(latency.get('p50'), '>9.1f')} {_format(latency.get('p90'), '>9.1f')} "
+                  f"{_format(latency.get('p99'), '>9.1f')} {_format(result['peak_rss_mb'], '>8.1f')}")
+
+    print()
+    print("=" * 96)
+    print("分支开销: snapshot/restore/clone vs deepcopy (微秒/次)")
+    print("=" * 96)
+    print(f"{'工作点':>8} {'snapshot':>12} {'restore':>12} {'clone':>12} {'deepcopy':>12} {'加速比':>8}")
+    for result in report["results"]:
+        branching = result["branching"]
+        branch_cost = branching["snapshot_us"] + branching["restore_us"]
+        print(f"{result['workpoints']:>8} {branching['snapshot_us']:>12.1f} {branching['restore_us']:>12.1f} "
+              f"{branching['clone_us']:>12.1f} {branching['deepcopy_us']:>12.1f} "
+              f"{branching['deepcopy_us'] / branch_cost:>7.1f}x")
+
+
+def print_comparison(report, baseline):
+    """打印当前结果相对之前结果的步/秒变化"""
+    previous = {result["workpoints"]: result for result in baseline["results"]}
+    print()
+    print("=" * 96)
+    print(f"与 {baseline['meta'].get('timestamp', '之前的结果')} 对比 (步/秒，当前/之前)")
+    print("=" * 96)
+    for result in report["results"]:
+        old = previous.get(result["workpoints"])
+        if old is None:
+            continue
+        ratios = []
+        for policy in POLICIES:
+            new_rate = result["policies"][policy]["steps_per_sec"]
+            old_rate = old["policies"].get(policy, {}).get("steps_per_sec")
+            ratio = new_rate / old_rate if new_rate and old_rate else None
+            ratios.append(f"{policy} {_format(ratio, '.2f')}x")
+        print(f"{result['workpoints']:>8}个工作点: " + ", ".join(ratios))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FactoryEnvironment 吞吐量基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="工作点数量")
+    parser.add_argument("--episodes", type=int, default=None, help="每种策略运行的episode数")
+    parser.add_argument("--max-actions", type=int, default=None, help="每个episode的最大动作数")
+    parser.add_argument("--seed", type=int, default=0, help="问题生成和随机策略的种子")
+    parser.add_argument("--output", default=None, help="结果JSON文件路径（默认写入result目录）")
+    parser.add_argument("--compare", default=None, help="用于对比的之前的结果JSON文件")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.episodes, args.max_actions, args.seed)
+    print_report(report)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+
+    output = args.output or get_result_path(FILE_PATHS["env_benchmark"])
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 基准结果已保存到: {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+经验回放基准 - 比较均匀采样与优先经验回放达到目标完工时间所需的训练轮数
+
+对同一个生成问题，分别用两种回放方式按DDQN_CONFIG的参数训练DDQN智能体（多个随机种子），
+记录每轮的完工时间和首次达到目标完工时间的轮次。目标默认为贪婪算法完工时间的
+--target-ratio倍，也可以用--target直接指定。训练过程不更新全局最优结果、不保存模型。
+
+用法:
+    python benchmark_replay.py                          # 默认 5 个工作点、3 个种子
+    python benchmark_replay.py --workpoints 10 --episodes 100 --seeds 0 1 2 3 4
+    python benchmark_replay.py --target 120             # 指定目标完工时间
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+
+import numpy as np
+import torch
+
+from config import DDQN_CONFIG, FILE_PATHS, get_result_path
+from ddqn_algorithm import create_agent, run_training_episode
+from greedy_algorithm import GreedyScheduler
+from benchmark_env import build_quiet_env, make_benchmark_workpoints
+
+
+REPLAY_MODES = ("uniform", "prioritized")
+
+
+def _seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def greedy_makespan(env):
+    """贪婪算法在该问题上的完工时间"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return GreedyScheduler(env).schedule()[1]
+
+
+def train_until_target(env, mode, episodes, max_steps, target, seed):
+    """
+    用指定回放方式训练一个智能体
+
+    Returns:
+        结果字典：首次达到目标的轮次(1起，未达到为None)、每轮完工时间、最佳完工时间和耗时
+    """
+    _seed_everything(seed)
+    state_size = len(env.reset())
+    agent = create_agent(env, state_size, prioritized=(mode == "prioritized"))
+
+    makespans = []
+    episodes_to_target = None
+    start = time.perf_counter()
+    for episode in range(episodes):
+        _, done, _, _ = run_training_episode(env, agent, episode, max_steps)
+        makespan = env.get_makespan() if done else float("inf")
+        makespans.append(makespan)
+        if episodes_to_target is None and makespan <= target:
+            episodes_to_target = episode + 1
+
+    return {
+        "seed": seed,
+        "episodes_to_target": episodes_to_target,
+        "best_makespan": min(makespans),
+        "makespans": [m if m != float("inf") else None for m in makespans],
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _summarize(runs, episodes):
+    reached = [run["episodes_to_target"] for run in runs if run["episodes_to_target"] is not None]
+    # 未达到目标的运行按episodes+1计入中位数
+    censored = [run["episodes_to_target"] or episodes + 1 for run in runs]
+    return {
+        "reached": len(reached),
+        "runs": len(runs),
+        "median_episodes_to_target": float(np.median(censored)),
+        "mean_episodes_to_target_reached": float(np.mean(reached)) if reached else None,
+        "mean_best_makespan": float(np.mean([run["best_makespan"] for run in runs])),
+        "mean_seconds": float(np.mean([run["seconds"] for run in runs])),
+    }
+
+
+def run_benchmark(num_workpoints=5, seeds=(0, 1, 2), episodes=60, max_steps=None, target=None,
+                  target_ratio=1.1, modes=REPLAY_MODES, problem_seed=0):
+    """运行全部回放方式和种子，返回可写入JSON的结果"""
+    if max_steps is None:
+        max_steps = DDQN_CONFIG["max_steps"]
+    env = build_quiet_env(make_benchmark_workpoints(num_workpoints, seed=problem_seed))
+    greedy = greedy_makespan(env)
+    if target is None:
+        target = greedy * target_ratio
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "workpoints": num_workpoints,
+            "steps": len(env.work_steps),
+            "problem_seed": problem_seed,
+            "episodes": episodes,
+            "max_steps": max_steps,
+            "greedy_makespan": greedy,
+            "target_makespan": target,
+            "per": {key: DDQN_CONFIG[key] for key in ("per_alpha", "per_beta", "per_beta_increment", "per_epsilon")},
+        },
+        "modes": {},
+    }
+    for mode in modes:
+        runs = []
+        for seed in seeds:
+            with contextlib.redirect_stdout(io.StringIO()):
+                run = train_until_target(env, mode, episodes, max_steps, target, seed)
+            runs.append(run)
+            print(f"{mode:>12} seed={seed}: 达到目标轮次={run['episodes_to_target']}, "
+                  f"最佳完工时间={run['best_makespan']:.2f}, 耗时={run['seconds']:.1f}s")
+        report["modes"][mode] = {"summary": _summarize(runs, episodes), "runs": runs}
+    return report
+
+
+def print_report(report):
+    meta = report["meta"]
+    print(f"\n{meta['workpoints']}个工作点 / {meta['steps']}个工序, 贪婪完工时间 {meta['greedy_makespan']:.2f}, "
+          f"目标 {meta['target_makespan']:.2f}, 每次训练 {meta['episodes']} 轮")
+    print(f"{'回放方式':<12}{'达到目标':>10}{'轮次中位数':>12}{'平均轮次':>10}{'平均最佳':>10}{'平均耗时s':>10}")
+    for mode, result in report["modes"].items():
+        s = result["summary"]
+        mean_reached = "-" if s["mean_episodes_to_target_reached"] is None else f"{s['mean_episodes_to_target_reached']:.1f}"
+        print(f"{mode:<12}{s['reached']:>7}/{s['runs']:<2}{s['median_episodes_to_target']:>12.1f}"
+              f"{mean_reached:>10}{s['mean_best_makespan']:>10.2f}{s['mean_seconds']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="均匀采样与优先经验回放的收敛速度对比")
+    parser.add_argument("--workpoints", type=int, default=5, help="生成问题的工作点数量")
+    parser.add_argument("--problem-seed", type=int, default=0, help="问题生成的种子")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2], help="训练的随机种子")
+    parser.add_argument("--episodes", type=int, default=60, help="每次训练的轮数")
+    parser.add_argument("--max-steps", type=int, default=None, help="每轮最大步数（默认DDQN_CONFIG）")
+    parser.add_argument("--target", type=float, default=None, help="目标完工时间")
+    parser.add_argument("--target-ratio", type=float, default=1.1, help="未指定--target时，目标为贪婪完工时间的倍数")
+    parser.add_argument("--modes", nargs="+", choices=REPLAY_MODES, default=list(REPLAY_MODES), help="回放方式")
+    parser.add_argument("--output", default=None, help="结果JSON文件路径（默认写入result目录）")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.workpoints, args.seeds, args.episodes, args.max_steps, args.target,
+                           args.target_ratio, args.modes, args.problem_seed)
+    print_report(report)
+
+    output = args.output or get_result_path(FILE_PATHS["replay_benchmark"])
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 基准结果已保存到: {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+候选动作特征模块 - 为候选评分网络生成与问题规模无关的输入特征
+
+每个候选动作对应一行特征 = 状态摘要 + 动作特征，维度只取决于团队配置(TEAMS_CONFIG)，
+与工作点和工序数量无关，因此同一个模型可以用于不同规模的问题。
+
+状态摘要: 各团队可用人员比例、已完成/进行中工序比例、就绪工序比例、
+         工作点平均/最小完成进度、当前时间
+动作特征: 动作类型、团队、人员占团队比例、工序数、平均实际耗时、工序顺序、
+         是否专用团队/并行工序、所在工作点的完成进度和剩余工作量、开始时间延迟
+"""
+
+import numpy as np
+
+from config import TEAMS_CONFIG
+
+
+ACTION_TYPES = ("single", "batch_start", "start_at", "advance_time")
+
+DURATION_SCALE = 10.0   # 时长类特征的归一化尺度
+ORDER_SCALE = 7.0       # 工序顺序的归一化尺度（标准模板的最大order）
+BATCH_SCALE = 3.0       # 批量动作工序数的归一化尺度
+TIME_SCALE = 1000.0     # 当前时间的归一化尺度（与环境状态一致）
+
+NUM_TEAMS = len(TEAMS_CONFIG)
+STATE_FEATURES = NUM_TEAMS + 6
+ACTION_FEATURES = len(ACTION_TYPES) + NUM_TEAMS + 10
+FEATURE_SIZE = STATE_FEATURES + ACTION_FEATURES
+
+
+class CandidateFeaturizer:
+    """按环境当前状态为候选动作生成特征矩阵"""
+
+    def __init__(self, env):
+        self.env = env
+        table = env.step_table
+        self.order = table.order / ORDER_SCALE
+        self.dedicated = table.dedicated.astype(np.float32)
+        self.parallel = table.parallel.astype(np.float32)
+        self.team = table.team
+        self.workpoint = table.workpoint
+        self.duration = table.duration
+        self.num_workpoints = len(env.workpoint_ids)
+
+    def state_summary(self):
+        """当前状态的固定维度摘要"""
+        env = self.env
+        num_steps = max(len(env.work_steps), 1)
+        progress = env.workpoint_completed / env._workpoint_divisor
+        return np.concatenate([
+            env.team_available / env.team_sizes,
+            [
+                float((env._status == 2).sum()) / num_steps,
+                float((env._status == 1).sum()) / num_steps,
+                len(env.ready_steps) / num_steps,
+                float(progress.mean()) if len(progress) else 1.0,
+                float(progress.min()) if len(progress) else 1.0,
+                min(1.0, env.current_time / TIME_SCALE),
+            ],
+        ]).astype(np.float32)
+
+    def encode(self, valid_actions):
+        """
+        生成候选动作的特征矩阵
+
+        Returns:
+            (len(valid_actions), FEATURE_SIZE)的float32数组，每行为状态摘要 + 动作特征
+        """
+        env = self.env
+        num = len(valid_actions)
+        features = np.zeros((num, FEATURE_SIZE), dtype=np.float32)
+        if not num:
+            return features
+        features[:, :STATE_FEATURES] = self.state_summary()
+
+        # 逐个解析动作（动作列表本身是Python对象），数值特征在下面向量化计算
+        kinds = np.zeros(num, dtype=np.int64)
+        lead = np.zeros(num, dtype=np.int64)
+        workers = np.zeros(num, dtype=np.float64)
+        counts = np.zeros(num, dtype=np.float64)
+        durations = np.zeros(num, dtype=np.float64)
+        delays = np.zeros(num, dtype=np.float64)
+        for k, (kind, payload) in enumerate(valid_actions):
+            if kind == "advance_time":
+                kinds[k] = 3
+                continue
+            if kind == "batch_start":
+                kinds[k] = 1
+                allocation = payload
+            elif kind == "start_at":
+                kinds[k] = 2
+                i, w, start = payload
+                allocation = ((i, w),)
+                delays[k] = start - env.current_time
+            else:
+                allocation = ((kind, payload),)
+            lead[k] = allocation[0][0]
+            workers[k] = sum(w for _, w in allocation)
+            counts[k] = len(allocation)
+            durations[k] = sum(env.get_adjusted_duration(i, w) for i, w in allocation) / len(allocation)
+
+        is_step = kinds != 3
+        team = self.team[lead]
+        workpoint = self.workpoint[lead]
+        progress = env.workpoint_completed / env._workpoint_divisor
+        pending = env._status != 2
+        remaining = np.bincount(self.workpoint, weights=self.duration * pending, minlength=self.num_workpoints)
+
+        col = STATE_FEATURES
+        features[np.arange(num), col + kinds] = 1.0
+        col += len(ACTION_TYPES)
+        rows = np.flatnonzero(is_step)
+        features[rows, col + team[rows]] = 1.0
+        col += NUM_TEAMS
+        action = np.stack([
+            workers / env.team_sizes[team],
+            counts / BATCH_SCALE,
+            durations / DURATION_SCALE,
+            self.order[lead],
+            self.dedicated[lead],
+            self.parallel[lead],
+            progress[workpoint],
+            remaining[workpoint] / (DURATION_SCALE * ORDER_SCALE),
+            delays / DURATION_SCALE,
+            workers / np.maximum(env.team_available[team], 1),
+        ], axis=1)
+        features[:, col:] = np.where(is_step[:, None], action, 0.0)
+        return features
@@ -69,19 +69,43 @@ STANDARD_STEP_TEMPLATES = [
     {"name": "合格报告出具", "order": 7, "team": "team3", "dedicated": False, "team_size": 10},
 ]
 
+# 调度环境参数
+ENVIRONMENT_CONFIG = {
+    "advance_all_simultaneous": False,  # 推进时间时是否一次处理同一时刻完成的所有工序
+    "cache_valid_actions": True,        # 按团队和工作点缓存候选动作，只重算受动作影响的部分
+    "schedule_mode": "timeline",        # 调度生成方式: timeline(逐步推进时间) / active(活动调度) / non_delay(无延迟调度)
+}
+
 # DDQN 算法参数
 DDQN_CONFIG = {
     "gamma": 0.99,          # 折扣因子
     "epsilon": 1.0,         # 探索率
     "epsilon_min": 0.01,    # 最小探索率
-    "epsilon_decay": 0.995, # 探索率衰减
+    "epsilon_decay": 0.995, # 探索率衰减（exponential为每个环境步的衰减系数，episode为每个episode的衰减系数）
+    "epsilon_schedule": "exponential",  # 探索率调度: linear / exponential(按环境步) / episode(按episode)
+    "epsilon_decay_steps": 1000,  # linear调度下探索率降到epsilon_min所需的环境步数（预热结束后计）
     "batch_size": 128,      # 批次大小
     "update_freq": 5,       # 目标网络更新频率
     "learning_rate": 0.001, # 学习率
     "memory_size": 10000,   # 经验回放缓冲区大小
     "episodes": 50,         # 训练轮数
     "max_steps": 200,      # 每轮最大步数
-    "action_size": 100      # 动作空间大小
+    "train_mode": "step",   # 训练时机: step(每train_every个环境步训练一次) / episode(每个episode结束时训练一次)
+    "train_every": 1,       # step模式下每多少个环境步训练一次
+    "gradient_steps": 1,    # 每次训练执行的梯度更新（经验回放）次数
+    "warmup_size": 128,     # 回放缓冲区至少有多少条经验才开始训练（不小于batch_size）
+    "network": "catalogue",    # 网络结构: catalogue(动作目录, 与问题规模相关) / candidate(候选评分, 与问题规模无关)
+    "warm_start": True,        # 候选评分网络是否从已保存的模型继续训练
+    "num_envs": 1,          # 同步运行的环境副本数（>1时使用VectorFactoryEnvironment批量训练）
+    "num_actors": 1,        # 采集经验的actor进程数（>1时启用多进程训练，优先于num_envs）
+    "actor_sync_interval": 50,  # learner每多少次回放更新向actor同步一次策略网络权重
+    "actor_chunk_size": 64,     # actor每次发送的经验条数
+    "actor_queue_size": 256,    # 经验队列的最大消息数（learner跟不上时actor等待）
+    "prioritized_replay": False,  # 是否使用优先经验回放（求和树按|TD误差|采样）
+    "per_alpha": 0.6,       # 优先级指数（0为均匀采样）
+    "per_beta": 0.4,        # 重要性采样权重指数的初始值
+    "per_beta_increment": 0.001,  # 每次采样beta的增量（增加到1为止）
+    "per_epsilon": 1e-6     # 优先级下限，避免经验永远不被采样
 }
 
 # 可视化参数
@@ -107,13 +131,16 @@ FILE_PATHS = {
     "best_schedule_pkl": "best_schedule.pkl",
     "best_model": "best_model.pth",
     "enhanced_model": "enhanced_best_model.pth",
+    "candidate_model": "candidate_model.pth",
     "process_gantt": "1_process_gantt.png",
     "workpoint_gantt": "2_workpoint_gantt.png", 
     "team_gantt": "3_team_gantt.png",
     "traditional_gantt": "best_schedule.png",
     "greedy_result": "greedy_best_schedule.png",
     "improved_greedy_result": "improved_greedy_best_schedule.png",
-    "global_best_tracker": "global_best_tracker.png"
+    "global_best_tracker": "global_best_tracker.png",
+    "env_benchmark": "benchmark_env.json",
+    "replay_benchmark": "benchmark_replay.json"
 }
 
 # 随机种子（用于结果复现）42
@@ -230,8 +230,8 @@ class DatabaseConnector:
             VALUES (%s, %s, %s, %s, %s, %s, %s)
             """
             
-            # 准备数据
-            insert_count = 0
+            # 准备数据（一次executemany批量插入）
+            rows = []
             for step in steps_data:
                 process_name = step.get("name")
                 process_order = step.get("order")
@@ -241,11 +241,12 @@ class DatabaseConnector:
                 duration = step.get("duration")
                 is_parallel = 1 if step.get("parallel", False) else 0
                 
-                values = (process_name, process_order, team_name, is_dedicated, 
-                         team_size, duration, is_parallel)
-                
-                cursor.execute(insert_query, values)
-                insert_count += 1
+                rows.append((process_name, process_order, team_name, is_dedicated,
+                             team_size, duration, is_parallel))
+            
+            if rows:
+                cursor.executemany(insert_query, rows)
+            insert_count = len(rows)
             
             self.connection.commit()
             print(f"✅ 成功向表 {table_name} 插入 {insert_count} 条工序数据")
@@ -7,15 +7,20 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-import random
-from collections import namedtuple, deque
+import os
+import time
+import weakref
 from tqdm import tqdm
 from config import DDQN_CONFIG, get_result_path, FILE_PATHS
+from profiling import profiled
 from global_best_tracker import global_best_tracker
-
-
-# 定义经验回放的数据结构
-Experience = namedtuple('Experience', ('state', 'action_idx', 'next_state', 'reward', 'done'))
+from scheduling_environment import VectorFactoryEnvironment
+from replay_memory import (
+    ReplayBuffer, PrioritizedReplayBuffer, CandidateReplayBuffer, PrioritizedCandidateReplayBuffer,
+)
+from action_catalogue import ActionCatalogue
+from candidate_features import CandidateFeaturizer, FEATURE_SIZE
+from exploration import create_epsilon_schedule
 
 
 class DDQNNetwork(nn.Module):
@@ -35,103 +40,245 @@ class DDQNNetwork(nn.Module):
         return self.fc4(x)
 
 
-class ReplayBuffer:
-    """经验回放缓冲区"""
-    
-    def __init__(self, capacity):
-        self.buffer = deque(maxlen=capacity)
+class CandidateScoringNetwork(nn.Module):
+    """
+    候选评分网络：对(状态摘要, 候选动作特征)逐行输出Q值
 
-    def push(self, *args):
-        self.buffer.append(Experience(*args))
+    输入维度只取决于特征定义，与问题规模无关；任意形状(..., input_dim)的输入
+    在一次前向计算中得到(...)的Q值。
+    """
 
-    def sample(self, batch_size):
-        return random.sample(self.buffer, batch_size)
+    def __init__(self, input_dim):
+        super(CandidateScoringNetwork, self).__init__()
+        self.fc1 = nn.Linear(input_dim, 128)
+        self.fc2 = nn.Linear(128, 128)
+        self.fc3 = nn.Linear(128, 64)
+        self.fc4 = nn.Linear(64, 1)
 
-    def __len__(self):
-        return len(self.buffer)
+    def forward(self, x):
+        x = torch.relu(self.fc1(x))
+        x = torch.relu(self.fc2(x))
+        x = torch.relu(self.fc3(x))
+        return self.fc4(x).squeeze(-1)
+
+
+def _per_options():
+    """优先经验回放缓冲区的配置参数"""
+    return {
+        "alpha": DDQN_CONFIG["per_alpha"],
+        "beta": DDQN_CONFIG["per_beta"],
+        "beta_increment": DDQN_CONFIG["per_beta_increment"],
+        "epsilon": DDQN_CONFIG["per_epsilon"],
+    }
 
 
 class DDQNAgent:
     """DDQN智能体"""
+
+    # save/load默认使用的FILE_PATHS键
+    model_file = "best_model"
     
-    def __init__(self, state_size, action_size, device='cpu'):
+    def __init__(self, state_size, catalogue, device='cpu', prioritized=None):
+        """
+        Args:
+            state_size: 状态维度
+            catalogue: 问题的动作目录（ActionCatalogue），网络为每个槽位输出一个Q值
+            prioritized: 是否使用优先经验回放（默认读取DDQN_CONFIG["prioritized_replay"]）
+        """
         self.state_size = state_size
-        self.action_size = action_size
-        self.memory = ReplayBuffer(DDQN_CONFIG["memory_size"])
+        self.catalogue = catalogue
+        self.action_size = catalogue.size
+        self._init_learning(device, prioritized)
+
+    def _create_network(self):
+        return DDQNNetwork(self.state_size, self.action_size)
+
+    def _create_memory(self, prioritized):
+        if prioritized:
+            return PrioritizedReplayBuffer(DDQN_CONFIG["memory_size"], self.state_size, self.action_size,
+                                           **_per_options())
+        return ReplayBuffer(DDQN_CONFIG["memory_size"], self.state_size, self.action_size)
+
+    def _init_learning(self, device, prioritized):
+        """创建回放缓冲区、策略网络和目标网络，并从配置加载训练参数"""
+        if prioritized is None:
+            prioritized = DDQN_CONFIG.get("prioritized_replay", False)
+        self.prioritized = prioritized
+        self.memory = self._create_memory(prioritized)
         self.device = device
 
         # 从配置加载参数
         self.gamma = DDQN_CONFIG["gamma"]
-        self.epsilon = DDQN_CONFIG["epsilon"]
-        self.epsilon_min = DDQN_CONFIG["epsilon_min"]
-        self.epsilon_decay = DDQN_CONFIG["epsilon_decay"]
         self.batch_size = DDQN_CONFIG["batch_size"]
         self.update_freq = DDQN_CONFIG["update_freq"]
+        self.train_mode = DDQN_CONFIG["train_mode"]
+        self.train_every = DDQN_CONFIG["train_every"]
+        self.gradient_steps = DDQN_CONFIG["gradient_steps"]
+        self.warmup_size = max(DDQN_CONFIG["warmup_size"], self.batch_size)
+        if self.train_mode not in ("step", "episode"):
+            raise ValueError(f"未知的训练时机: {self.train_mode}")
+        self._steps_since_train = 0
+
+        # 探索率由已完成的环境步数/episode数决定，与经验回放次数无关；
+        # 按环境步的调度从第warmup_size步（缓冲区可以开始训练时）开始衰减
+        self.epsilon_schedule = create_epsilon_schedule(delay_steps=self.warmup_size - 1)
+        self.env_steps = 0
+        self.episodes = 0
+        self.epsilon = self.epsilon_schedule.value(0, 0)
 
         # 创建策略网络和目标网络
-        self.policy_net = DDQNNetwork(state_size, action_size).to(device)
-        self.target_net = DDQNNetwork(state_size, action_size).to(device)
+        self.policy_net = self._create_network().to(device)
+        self.target_net = self._create_network().to(device)
         self.target_net.load_state_dict(self.policy_net.state_dict())
         self.target_net.eval()  # 设置目标网络为评估模式
 
         self.optimizer = optim.Adam(self.policy_net.parameters(), lr=DDQN_CONFIG["learning_rate"])
         self.criterion = nn.MSELoss()
 
-    def remember(self, state, action_idx, next_state, reward, done):
-        """存储经验到回放缓冲区"""
-        self.memory.push(state, action_idx, next_state, reward, done)
-
-    def act(self, state, valid_actions):
-        """选择动作（epsilon-贪婪策略）"""
-        if np.random.rand() <= self.epsilon:
-            return np.random.randint(0, len(valid_actions))
+        # 实际执行的经验回放梯度更新次数
+        self.replay_updates = 0
 
-        # 获取状态的Q值
-        state_tensor = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-        with torch.no_grad():
-            q_values = self.policy_net(state_tensor).cpu().numpy()[0]
+    def encode(self, env, valid_actions):
+        """把环境的有效动作编码为act/remember使用的形式（动作目录槽位）"""
+        return self.catalogue.encode(valid_actions)
 
-        # 为有效动作过滤Q值
-        valid_q_values = [(i, q_values[i % len(q_values)]) for i in range(len(valid_actions))]
+    def remember(self, state, action_slot, next_state, reward, done, next_slots):
+        """
+        存储经验到回放缓冲区
 
-        # 返回具有最高Q值的动作
-        return max(valid_q_values, key=lambda x: x[1])[0]
+        Args:
+            action_slot: 执行动作在动作目录中的槽位（-1表示超出目录，不存储）
+            next_slots: 下一状态有效动作的槽位数组
+        """
+        if action_slot < 0:
+            return
+        self.memory.push(state, action_slot, next_state, reward, done, next_slots)
+
+    def act(self, state, slots):
+        """
+        选择动作（epsilon-贪婪策略）
+
+        Args:
+            state: 状态数组
+            slots: 有效动作的槽位数组（ActionCatalogue.encode）
+
+        Returns:
+            所选动作在有效动作列表中的下标
+        """
+        return self.act_batch(state[np.newaxis], [slots])[0]
+
+    def act_batch(self, states, slots_list):
+        """
+        为一批环境选择动作（epsilon-贪婪策略），策略网络只做一次批量前向计算，
+        贪婪选择为一次带有效动作掩码的argmax
+
+        Args:
+            states: (B, state_size)状态数组
+            slots_list: 每个环境有效动作的槽位数组，没有有效动作的环境为空数组
+
+        Returns:
+            每个环境所选动作在其有效动作列表中的下标，没有有效动作的环境为None
+        """
+        action_idxs = [None] * len(slots_list)
+        greedy_rows = []
+        for b, slots in enumerate(slots_list):
+            if not len(slots):
+                continue
+            representable = np.flatnonzero(slots >= 0)
+            if not len(representable):
+                # 所有动作都超出动作目录时随机选择（不会存入回放）
+                action_idxs[b] = np.random.randint(0, len(slots))
+            elif np.random.rand() <= self.epsilon:
+                action_idxs[b] = int(representable[np.random.randint(0, len(representable))])
+            else:
+                greedy_rows.append(b)
+
+        if greedy_rows:
+            masks = torch.from_numpy(self.catalogue.mask([slots_list[b] for b in greedy_rows])).to(self.device)
+            state_tensor = torch.from_numpy(np.ascontiguousarray(states[greedy_rows], dtype=np.float32)).to(self.device)
+            with torch.no_grad():
+                q_values = self.policy_net(state_tensor).masked_fill(~masks, float('-inf'))
+                best_slots = q_values.argmax(1).cpu().numpy()
+
+            for b, slot in zip(greedy_rows, best_slots):
+                action_idxs[b] = int(np.flatnonzero(slots_list[b] == slot)[0])
+
+        return action_idxs
+
+    def count_updates(self, env_steps=0, episodes=0):
+        """
+        按训练时机配置返回新增的环境步/结束的episode对应的梯度更新次数
+
+        step模式下每累计train_every个环境步对应gradient_steps次更新，
+        episode模式下每个结束的episode对应gradient_steps次更新。
+        """
+        if self.train_mode == "episode":
+            return episodes * self.gradient_steps
+        self._steps_since_train += env_steps
+        trains, self._steps_since_train = divmod(self._steps_since_train, self.train_every)
+        return trains * self.gradient_steps
+
+    def advance_exploration(self, env_steps=0, episodes=0):
+        """记录新增的环境步/结束的episode，并按探索率调度更新epsilon"""
+        self.env_steps += env_steps
+        self.episodes += episodes
+        self.epsilon = self.epsilon_schedule.value(self.env_steps, self.episodes)
+
+    def learn(self, env_steps=0, episodes=0):
+        """记录新增的环境步/结束的episode，并执行对应次数的经验回放"""
+        for _ in range(self.count_updates(env_steps, episodes)):
+            self.replay()
 
     def replay(self):
-        """经验回放学习"""
-        if len(self.memory) < self.batch_size:
+        """经验回放学习（缓冲区不足warmup_size条经验时不更新）"""
+        if len(self.memory) < self.warmup_size:
             return
 
         # 采样批次
         batch = self.memory.sample(self.batch_size)
-        states = torch.FloatTensor([exp.state for exp in batch]).to(self.device)
-        action_idxs = torch.LongTensor([exp.action_idx for exp in batch]).unsqueeze(1).to(self.device)
-        rewards = torch.FloatTensor([exp.reward for exp in batch]).to(self.device)
-        next_states = torch.FloatTensor([exp.next_state for exp in batch]).to(self.device)
-        dones = torch.FloatTensor([exp.done for exp in batch]).to(self.device)
+        current_q, target_q = self._q_and_target(batch)
+
+        # 更新策略网络
+        if self.prioritized:
+            # 按重要性采样权重加权的均方误差，并用新的TD误差更新优先级
+            sample_idx, weights = batch[-2:]
+            td_errors = target_q - current_q
+            loss = (torch.from_numpy(weights).to(self.device) * td_errors.pow(2)).mean()
+            self.memory.update_priorities(sample_idx, td_errors.detach().cpu().numpy())
+        else:
+            loss = self.criterion(current_q, target_q)
+        self.optimizer.zero_grad()
+        loss.backward()
+        # 应用梯度裁剪
+        torch.nn.utils.clip_grad_norm_(self.policy_net.parameters(), 1.0)
+        self.optimizer.step()
+        self.replay_updates += 1
+
+    def _q_and_target(self, batch):
+        """由采样批次计算当前Q值和DDQN目标Q值"""
+        states, action_idxs, rewards, next_states, dones, next_masks = batch[:6]
+        states = torch.from_numpy(states).to(self.device)
+        action_idxs = torch.from_numpy(action_idxs).unsqueeze(1).to(self.device)
+        rewards = torch.from_numpy(rewards).to(self.device)
+        next_states = torch.from_numpy(next_states).to(self.device)
+        dones = torch.from_numpy(dones).to(self.device)
+        next_masks = torch.from_numpy(next_masks).to(self.device)
 
         # 获取当前Q值
         current_q = self.policy_net(states).gather(1, action_idxs).squeeze(1)
 
-        # DDQN更新：使用策略网络选择动作，目标网络评估
+        # DDQN更新：使用策略网络在下一状态的有效动作中选择动作，目标网络评估
         with torch.no_grad():
-            next_actions = self.policy_net(next_states).max(1)[1].unsqueeze(1)
+            next_q = self.policy_net(next_states).masked_fill(~next_masks, float('-inf'))
+            next_actions = next_q.argmax(1, keepdim=True)
             max_next_q = self.target_net(next_states).gather(1, next_actions).squeeze(1)
+            # 下一状态没有有效动作时不再引导
+            has_next = next_masks.any(1).float()
 
             # 计算目标Q值
-            target_q = rewards + (self.gamma * max_next_q * (1 - dones))
-
-        # 更新策略网络
-        loss = self.criterion(current_q, target_q)
-        self.optimizer.zero_grad()
-        loss.backward()
-        # 应用梯度裁剪
-        torch.nn.utils.clip_grad_norm_(self.policy_net.parameters(), 1.0)
-        self.optimizer.step()
+            target_q = rewards + (self.gamma * max_next_q * (1 - dones) * has_next)
 
-        # 衰减epsilon
-        if self.epsilon > self.epsilon_min:
-            self.epsilon *= self.epsilon_decay
+        return current_q, target_q
 
     def update_target_network(self):
         """更新目标网络"""
@@ -140,21 +287,23 @@ class DDQNAgent:
     def save(self, filename=None):
         """保存模型到result文件夹"""
         if filename is None:
-            filename = FILE_PATHS["best_model"]
+            filename = FILE_PATHS[self.model_file]
         
         model_path = get_result_path(filename)
         torch.save({
             'policy_model': self.policy_net.state_dict(),
             'target_model': self.target_net.state_dict(),
             'optimizer': self.optimizer.state_dict(),
-            'epsilon': self.epsilon
+            'epsilon': self.epsilon,
+            'env_steps': self.env_steps,
+            'episodes': self.episodes
         }, model_path)
         print(f"✅ 模型已保存到: {model_path}")
 
     def load(self, filename=None):
         """从result文件夹加载模型"""
         if filename is None:
-            filename = FILE_PATHS["best_model"]
+            filename = FILE_PATHS[self.model_file]
         
         model_path = get_result_path(filename)
         try:
@@ -163,31 +312,176 @@ class DDQNAgent:
             self.target_net.load_state_dict(checkpoint['target_model'])
             self.optimizer.load_state_dict(checkpoint['optimizer'])
             self.epsilon = checkpoint['epsilon']
+            # 继续训练时探索率调度从保存时的进度继续
+            self.env_steps = checkpoint.get('env_steps', 0)
+            self.episodes = checkpoint.get('episodes', 0)
             print(f"✅ 模型已从 {model_path} 加载")
         except Exception as e:
             print(f"⚠️  模型加载失败: {e}")
 
 
-def train_ddqn_agent(env, workpoints_data=None):
+class CandidateDDQNAgent(DDQNAgent):
+    """
+    候选评分DDQN智能体
+
+    Q(s, a)由CandidateScoringNetwork对"状态摘要 + 候选动作特征"评分得到，网络与问题规模无关，
+    训练好的模型可以直接用于不同数量工作点的问题，也可以在之前的模型上继续训练。
+    动作选择和DDQN目标值都是对补齐后的候选批次做一次前向计算和带掩码的argmax。
+    """
+
+    model_file = "candidate_model"
+
+    def __init__(self, device='cpu', prioritized=None):
+        """
+        Args:
+            prioritized: 是否使用优先经验回放（默认读取DDQN_CONFIG["prioritized_replay"]）
+        """
+        self.feature_size = FEATURE_SIZE
+        # 每个环境（含向量化环境的副本）一个特征生成器
+        self._featurizers = weakref.WeakKeyDictionary()
+        self._init_learning(device, prioritized)
+
+    def _create_network(self):
+        return CandidateScoringNetwork(self.feature_size)
+
+    def _create_memory(self, prioritized):
+        if prioritized:
+            return PrioritizedCandidateReplayBuffer(DDQN_CONFIG["memory_size"], self.feature_size, **_per_options())
+        return CandidateReplayBuffer(DDQN_CONFIG["memory_size"], self.feature_size)
+
+    def encode(self, env, valid_actions):
+        """把环境的有效动作编码为候选特征矩阵"""
+        featurizer = self._featurizers.get(env)
+        if featurizer is None:
+            featurizer = self._featurizers[env] = CandidateFeaturizer(env)
+        return featurizer.encode(valid_actions)
+
+    def remember(self, state, action_features, next_state, reward, done, next_features):
+        """
+        存储经验到回放缓冲区
+
+        Args:
+            action_features: 所选候选动作的特征行
+            next_features: 下一状态全部候选动作的特征矩阵
+        """
+        self.memory.push(action_features, reward, done, next_features)
+
+    def act_batch(self, states, features_list):
+        """
+        为一批环境选择动作（epsilon-贪婪策略），所有贪婪选择的候选补齐后只做一次前向计算
+
+        Args:
+            states: (B, state_size)状态数组（候选特征已包含状态摘要，不直接使用）
+            features_list: 每个环境的候选特征矩阵，没有有效动作的环境为空矩阵
+
+        Returns:
+            每个环境所选动作在其有效动作列表中的下标，没有有效动作的环境为None
+        """
+        action_idxs = [None] * len(features_list)
+        greedy_rows = []
+        for b, features in enumerate(features_list):
+            if not len(features):
+                continue
+            if np.random.rand() <= self.epsilon:
+                action_idxs[b] = np.random.randint(0, len(features))
+            else:
+                greedy_rows.append(b)
+
+        if greedy_rows:
+            counts = [len(features_list[b]) for b in greedy_rows]
+            padded = np.zeros((len(greedy_rows), max(counts), self.feature_size), dtype=np.float32)
+            masks = np.zeros((len(greedy_rows), max(counts)), dtype=bool)
+            for row, (b, count) in enumerate(zip(greedy_rows, counts)):
+                padded[row, :count] = features_list[b]
+                masks[row, :count] = True
+            with torch.no_grad():
+                q_values = self.policy_net(torch.from_numpy(padded).to(self.device))
+                q_values = q_values.masked_fill(~torch.from_numpy(masks).to(self.device), float('-inf'))
+                best = q_values.argmax(1).cpu().numpy()
+            for b, idx in zip(greedy_rows, best):
+                action_idxs[b] = int(idx)
+
+        return action_idxs
+
+    def _q_and_target(self, batch):
+        """由采样批次计算当前Q值和DDQN目标Q值"""
+        features, rewards, dones, next_features, next_masks = batch[:5]
+        features = torch.from_numpy(features).to(self.device)
+        rewards = torch.from_numpy(rewards).to(self.device)
+        dones = torch.from_numpy(dones).to(self.device)
+        next_features = torch.from_numpy(next_features).to(self.device)
+        next_masks = torch.from_numpy(next_masks).to(self.device)
+
+        current_q = self.policy_net(features)
+
+        # DDQN更新：策略网络在下一状态的候选中选择，目标网络评估
+        with torch.no_grad():
+            next_q = self.policy_net(next_features).masked_fill(~next_masks, float('-inf'))
+            next_actions = next_q.argmax(1, keepdim=True)
+            max_next_q = self.target_net(next_features).gather(1, next_actions).squeeze(1)
+            has_next = next_masks.any(1).float()
+            target_q = rewards + (self.gamma * max_next_q * (1 - dones) * has_next)
+
+        return current_q, target_q
+
+
+def create_agent(env, state_size, device='cpu', prioritized=None):
+    """
+    按DDQN_CONFIG["network"]创建智能体
+
+    Args:
+        env: 调度环境（动作目录网络据此确定动作槽位）
+        state_size: 状态维度（仅动作目录网络使用）
+    """
+    if DDQN_CONFIG["network"] == "candidate":
+        return CandidateDDQNAgent(device, prioritized)
+    return DDQNAgent(state_size, ActionCatalogue.for_env(env), device, prioritized)
+
+
+def train_ddqn_agent(env, workpoints_data=None, metrics=None, profile=None):
     """
     训练DDQN智能体
     
     Args:
         env: 调度环境
         workpoints_data: 工作点数据字典（用于全局最优跟踪）
+        metrics: 可选的RunMetrics，记录每轮耗时及环境步数、有效动作查询和回放更新次数
+        profile: 是否剖析训练过程（见profiling.resolve_profile_mode；已在RUN中剖析时不重复剖析）
     """
+    with profiled("train_ddqn_agent", profile):
+        return _train_ddqn_agent(env, workpoints_data, metrics)
+
+
+def _train_ddqn_agent(env, workpoints_data, metrics):
+    """train_ddqn_agent的实际训练流程"""
     device = 'cuda' if torch.cuda.is_available() else 'cpu'
     
     state_size = len(env.reset())
-    action_size = DDQN_CONFIG["action_size"]
     episodes = DDQN_CONFIG["episodes"]
     max_steps = DDQN_CONFIG["max_steps"]
+    num_envs = DDQN_CONFIG["num_envs"]
+
+    agent = create_agent(env, state_size, device)
 
     print(f"状态空间维度: {state_size}")
+    if isinstance(agent, CandidateDDQNAgent):
+        print(f"候选评分网络, 特征维度: {agent.feature_size}")
+        # 候选评分网络与问题规模无关，可以在之前训练的模型上继续训练
+        if DDQN_CONFIG["warm_start"] and os.path.exists(get_result_path(FILE_PATHS[agent.model_file])):
+            agent.load()
+    else:
+        print(f"动作目录大小: {agent.action_size}")
     print(f"总工序数量: {len(env.work_steps)}")
     print(f"使用设备: {device}")
 
-    agent = DDQNAgent(state_size, action_size, device)
+    num_actors = DDQN_CONFIG["num_actors"]
+    if num_actors > 1:
+        print(f"actor进程数: {num_actors}")
+        return _train_with_actors(env, agent, workpoints_data, num_actors, metrics)
+
+    if num_envs > 1:
+        print(f"并行环境副本数: {num_envs}")
+        return _train_vectorized(env, agent, workpoints_data, num_envs, metrics)
 
     episode_rewards = []
     episode_makespans = []
@@ -196,30 +490,8 @@ def train_ddqn_agent(env, workpoints_data=None):
 
     # 训练循环
     for episode in tqdm(range(episodes), desc="Training Progress", ncols=100):
-        state = env.reset()
-        total_reward = 0
-        done = False
-        step_counter = 0
-
-        # 单个episode内的步骤循环
-        while not done and step_counter < max_steps:
-            valid_actions = env.get_valid_actions()
-
-            if not valid_actions:
-                break
-
-            action_idx = agent.act(state, valid_actions)
-            action = valid_actions[action_idx]
-
-            next_state, reward, done = env.step(action)
-
-            agent.remember(state, action_idx, next_state, reward, done)
-            agent.replay()
-
-            state = next_state
-            total_reward += reward
-            step_counter += 1
-
+        episode_start = time.perf_counter()
+        total_reward, _, step_counter, valid_action_calls = run_training_episode(env, agent, episode, max_steps)
         makespan = env.get_makespan()
         
         # 更新最佳结果
@@ -227,26 +499,230 @@ def train_ddqn_agent(env, workpoints_data=None):
             best_makespan = makespan
             best_schedule = env.get_schedule()
             print(f"Episode {episode}: 新的最佳完工时间 {best_makespan:.2f}")
-            
-            # 更新全局最优结果
-            model_path = get_result_path(FILE_PATHS["best_model"])
-            if workpoints_data is not None:
-                global_best_tracker.update_best_result(
-                    schedule=best_schedule,
-                    makespan=best_makespan,
-                    algorithm_name="原版DDQN",
-                    workpoints_data=workpoints_data,
-                    episode=episode,
-                    model_path=model_path
-                )
-
-        # 更新目标网络
-        if episode % agent.update_freq == 0:
-            agent.update_target_network()
+            _update_global_best(best_schedule, best_makespan, workpoints_data, episode, agent.model_file)
 
         episode_rewards.append(total_reward)
         episode_makespans.append(makespan)
 
+        if metrics is not None:
+            metrics.record_episode(time.perf_counter() - episode_start)
+            metrics.count("env_steps", step_counter)
+            metrics.count("valid_action_calls", valid_action_calls)
+
+    _print_action_cache_stats([env])
+    if metrics is not None:
+        metrics.count("replay_updates", agent.replay_updates)
+
+    # 训练完成后保存模型
+    print("训练完成，保存模型...")
+    agent.save()
+
+    return agent, env, best_schedule, episode_rewards, episode_makespans
+
+
+def run_training_episode(env, agent, episode, max_steps):
+    """
+    在env上运行一个训练episode（单进程训练和基准脚本共用）
+
+    每步选择动作、执行、保存经验，并按训练时机配置更新网络、按环境步推进探索率；
+    episode结束后推进episode计数，并按update_freq更新目标网络。
+
+    Args:
+        episode: 当前训练轮次（从0开始，用于目标网络更新）
+
+    Returns:
+        (total_reward, done, step_counter, valid_action_calls)
+    """
+    state = env.reset()
+    total_reward = 0
+    done = False
+    step_counter = 0
+    valid_actions = env.get_valid_actions()
+    slots = agent.encode(env, valid_actions)
+    valid_action_calls = 1
+
+    # 单个episode内的步骤循环
+    while not done and step_counter < max_steps:
+        if not valid_actions:
+            break
+
+        action_idx = agent.act(state, slots)
+        action = valid_actions[action_idx]
+
+        next_state, reward, done = env.step(action)
+
+        # 下一状态的有效动作同时用于DDQN目标值的掩码和下一步的动作选择
+        valid_actions = env.get_valid_actions()
+        valid_action_calls += 1
+        next_slots = agent.encode(env, valid_actions)
+
+        agent.remember(state, slots[action_idx], next_state, reward, done, next_slots)
+        agent.advance_exploration(env_steps=1)
+        agent.learn(env_steps=1)
+
+        state = next_state
+        slots = next_slots
+        total_reward += reward
+        step_counter += 1
+
+    agent.advance_exploration(episodes=1)
+    agent.learn(episodes=1)
+
+    # 更新目标网络
+    if episode % agent.update_freq == 0:
+        agent.update_target_network()
+
+    return total_reward, done, step_counter, valid_action_calls
+
+
+def _update_global_best(schedule, makespan, workpoints_data, episode, model_file="best_model"):
+    """将训练中的最佳结果提交给全局最优跟踪器"""
+    model_path = get_result_path(FILE_PATHS[model_file])
+    if workpoints_data is not None:
+        global_best_tracker.update_best_result(
+            schedule=schedule,
+            makespan=makespan,
+            algorithm_name="原版DDQN",
+            workpoints_data=workpoints_data,
+            episode=episode,
+            model_path=model_path
+        )
+
+
+def _print_action_cache_stats(envs):
+    """汇总并打印训练过程中候选动作缓存的命中情况"""
+    calls = hits = misses = 0
+    for sub_env in envs:
+        stats = sub_env.get_action_cache_stats()
+        calls += stats["calls"]
+        hits += stats["hits"]
+        misses += stats["misses"]
+    if calls == 0:
+        return  # 按最早开始时间调度时不使用候选动作缓存
+    total = hits + misses
+    hit_rate = hits / total if total else 0.0
+    print(f"候选动作缓存: {calls}次查询, 复用{hits}/重算{misses}个(团队,工作点)条目, 命中率{hit_rate:.1%}")
+
+
+def _train_vectorized(env, agent, workpoints_data, num_envs, metrics=None):
+    """
+    使用VectorFactoryEnvironment同步运行num_envs个episode进行训练
+
+    每个批次步中策略网络对所有副本做一次前向计算，训练时机按一个环境步计算（train_every）；
+    每个副本的episode结束后各自计入一个训练轮次（计时按批次耗时平均分摊）。
+    """
+    episodes = DDQN_CONFIG["episodes"]
+    max_steps = DDQN_CONFIG["max_steps"]
+    vec_env = VectorFactoryEnvironment(num_envs=num_envs, env=env)
+
+    episode_rewards = []
+    episode_makespans = []
+    best_makespan = float('inf')
+    best_schedule = None
+    episode = 0
+
+    progress = tqdm(total=episodes, desc="Training Progress", ncols=100)
+    while episode < episodes:
+        batch_start = time.perf_counter()
+        states = vec_env.reset()
+        total_rewards = np.zeros(num_envs)
+        active = np.ones(num_envs, dtype=bool)
+        step_counter = 0
+        env_steps = 0
+        valid_action_calls = num_envs
+        valid_actions_list = vec_env.get_valid_actions()
+        slots_list = [agent.encode(sub_env, valid_actions)
+                      for sub_env, valid_actions in zip(vec_env.envs, valid_actions_list)]
+
+        while active.any() and step_counter < max_steps:
+            active &= np.array([bool(valid_actions) for valid_actions in valid_actions_list])
+            if not active.any():
+                break
+
+            action_idxs = agent.act_batch(
+                states, [slots if is_active else slots[:0] for slots, is_active in zip(slots_list, active)]
+            )
+            actions = [
+                valid_actions[idx] if is_active else None
+                for valid_actions, idx, is_active in zip(valid_actions_list, action_idxs, active)
+            ]
+
+            next_states, rewards, dones = vec_env.step(actions)
+            env_steps += int(active.sum())
+
+            # 下一状态的有效动作同时用于DDQN目标值的掩码和下一步的动作选择
+            valid_action_calls += int((~vec_env.dones).sum())
+            next_valid_actions_list = vec_env.get_valid_actions()
+            next_slots_list = [agent.encode(sub_env, valid_actions)
+                               for sub_env, valid_actions in zip(vec_env.envs, next_valid_actions_list)]
+
+            for b in np.flatnonzero(active):
+                agent.remember(states[b], slots_list[b][action_idxs[b]], next_states[b], rewards[b], dones[b],
+                               next_slots_list[b])
+            # 探索率按实际执行的环境步数衰减，训练时机按批次步计算
+            agent.advance_exploration(env_steps=int(active.sum()))
+            agent.learn(env_steps=1)
+
+            total_rewards[active] += rewards[active]
+            active &= ~dones
+            states = next_states
+            valid_actions_list = next_valid_actions_list
+            slots_list = next_slots_list
+            step_counter += 1
+
+        if metrics is not None:
+            batch_time = time.perf_counter() - batch_start
+            for _ in range(min(num_envs, episodes - episode)):
+                metrics.record_episode(batch_time / num_envs)
+            metrics.count("env_steps", env_steps)
+            metrics.count("valid_action_calls", valid_action_calls)
+
+        # 每个副本计为一个episode
+        for b, sub_env in enumerate(vec_env.envs):
+            if episode >= episodes:
+                break
+            makespan = sub_env.get_makespan()
+            if makespan < best_makespan:
+                best_makespan = makespan
+                best_schedule = sub_env.get_schedule()
+                print(f"Episode {episode}: 新的最佳完工时间 {best_makespan:.2f}")
+                _update_global_best(best_schedule, best_makespan, workpoints_data, episode, agent.model_file)
+
+            if episode % agent.update_freq == 0:
+                agent.update_target_network()
+
+            agent.advance_exploration(episodes=1)
+            agent.learn(episodes=1)
+            episode_rewards.append(float(total_rewards[b]))
+            episode_makespans.append(makespan)
+            episode += 1
+            progress.update(1)
+    progress.close()
+
+    _print_action_cache_stats(vec_env.envs)
+    if metrics is not None:
+        metrics.count("replay_updates", agent.replay_updates)
+
+    # 训练完成后保存模型
+    print("训练完成，保存模型...")
+    agent.save()
+
+    return agent, env, best_schedule, episode_rewards, episode_makespans
+
+
+def _train_with_actors(env, agent, workpoints_data, num_actors, metrics=None):
+    """使用num_actors个actor进程采集经验、当前进程训练（见parallel_training）"""
+    from parallel_training import train_parallel
+
+    def update_global_best(schedule, makespan, episode):
+        _update_global_best(schedule, makespan, workpoints_data, episode, agent.model_file)
+
+    episode_rewards, episode_makespans, best_schedule = train_parallel(
+        env, agent, num_actors, metrics, update_global_best
+    )
+    if metrics is not None:
+        metrics.count("replay_updates", agent.replay_updates)
+
     # 训练完成后保存模型
     print("训练完成，保存模型...")
     agent.save()
@@ -261,8 +737,7 @@ def run_best_schedule(env, agent_file=None):
 
     # 创建代理
     state_size = len(env.reset())
-    action_size = DDQN_CONFIG["action_size"]
-    agent = DDQNAgent(state_size, action_size, device)
+    agent = create_agent(env, state_size, device)
     
     # 如果提供了模型文件，加载它
     if agent_file:
@@ -283,7 +758,7 @@ def run_best_schedule(env, agent_file=None):
         if not valid_actions:
             break
 
-        action_idx = agent.act(state, valid_actions)
+        action_idx = agent.act(state, agent.encode(env, valid_actions))
         action = valid_actions[action_idx]
 
         next_state, _, done = env.step(action)
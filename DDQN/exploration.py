@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+探索率调度模块 - epsilon按环境步数或episode数衰减，与经验回放的次数无关
+
+调整batch_size、train_every、gradient_steps等训练速度参数时，探索过程保持不变。
+
+    linear:      每个环境步线性下降，epsilon_decay_steps步后到达epsilon_min
+    exponential: 每个环境步乘以epsilon_decay
+    episode:     每个episode结束乘以epsilon_decay
+
+按环境步的调度可以设置delay_steps，前delay_steps个环境步（回放缓冲区预热期间）不衰减。
+"""
+
+from config import DDQN_CONFIG
+
+
+class LinearEpsilonSchedule:
+    """按环境步数线性衰减"""
+
+    def __init__(self, start, end, decay_steps, delay_steps=0):
+        self.start = start
+        self.end = end
+        self.decay_steps = max(decay_steps, 1)
+        self.delay_steps = delay_steps
+
+    def value(self, env_steps, episodes):
+        fraction = min(max(env_steps - self.delay_steps, 0) / self.decay_steps, 1.0)
+        return self.start + fraction * (self.end - self.start)
+
+
+class ExponentialEpsilonSchedule:
+    """按环境步数指数衰减"""
+
+    def __init__(self, start, end, decay, delay_steps=0):
+        self.start = start
+        self.end = end
+        self.decay = decay
+        self.delay_steps = delay_steps
+
+    def value(self, env_steps, episodes):
+        return max(self.end, self.start * self.decay ** max(env_steps - self.delay_steps, 0))
+
+
+class EpisodeEpsilonSchedule:
+    """按episode数指数衰减"""
+
+    def __init__(self, start, end, decay):
+        self.start = start
+        self.end = end
+        self.decay = decay
+
+    def value(self, env_steps, episodes):
+        return max(self.end, self.start * self.decay ** episodes)
+
+
+def create_epsilon_schedule(delay_steps=0):
+    """
+    按DDQN_CONFIG["epsilon_schedule"]创建探索率调度
+
+    Args:
+        delay_steps: 按环境步的调度在前多少个环境步不衰减（episode调度忽略）
+    """
+    kind = DDQN_CONFIG["epsilon_schedule"]
+    start, end = DDQN_CONFIG["epsilon"], DDQN_CONFIG["epsilon_min"]
+    if kind == "linear":
+        return LinearEpsilonSchedule(start, end, DDQN_CONFIG["epsilon_decay_steps"], delay_steps)
+    if kind == "exponential":
+        return ExponentialEpsilonSchedule(start, end, DDQN_CONFIG["epsilon_decay"], delay_steps)
+    if kind == "episode":
+        return EpisodeEpsilonSchedule(start, end, DDQN_CONFIG["epsilon_decay"])
+    raise ValueError(f"未知的探索率调度: {kind}")
@@ -69,20 +69,28 @@ class GreedyScheduler:
         if not valid_actions:
             return None
         
-        # 分离推进时间动作和工序动作
+        # 分离推进时间动作、批量启动动作和工序动作
         advance_actions = []
+        batch_actions = []
         step_actions = []
         
         for action in valid_actions:
             if action[0] == "advance_time":
                 advance_actions.append(action)
-            else:
+            elif action[0] == "batch_start":
+                batch_actions.append(action)
+            elif action[0] == "start_at" or not isinstance(action[0], str):
+                # 单个工序启动动作: (工序下标, workers) 或 ("start_at", (工序下标, workers, 开始时间))
                 step_actions.append(action)
         
         # 如果有可开始的工序，优先执行工序而不是推进时间
         if step_actions:
             return self._select_best_step_action(step_actions)
         
+        # 并行工序只能批量启动时，执行第一个批量方案（均匀分配）
+        if batch_actions:
+            return batch_actions[0]
+        
         # 如果只有推进时间动作，执行它
         if advance_actions:
             return advance_actions[0]
@@ -101,14 +109,10 @@ class GreedyScheduler:
         workpoint_progress = self._get_workpoint_progress()
         
         for action in step_actions:
-            step_id, workers = action
-            step = self.env._get_step_by_id(step_id)
-            
-            if step is None:
-                continue
+            i, workers = action[1][:2] if action[0] == "start_at" else action
             
             # 计算综合评分
-            score = self._calculate_improved_greedy_score(step, workers, workpoint_progress)
+            score = self._calculate_improved_greedy_score(i, workers, workpoint_progress)
             
             if score > best_score:
                 best_score = score
@@ -117,31 +121,21 @@ class GreedyScheduler:
         return best_action
     
     def _get_workpoint_progress(self):
-        """获取各工作点的当前进度"""
-        workpoint_progress = {}
-        
-        # 遍历所有工序，统计各工作点的进度
-        for step_id, step in self.env.steps.items():
-            workpoint_id = step.get('workpoint_id', 'unknown')
-            
-            if workpoint_id not in workpoint_progress:
-                workpoint_progress[workpoint_id] = {
-                    'completed': 0,
-                    'total': 0,
-                    'current_order': 0
-                }
-            
-            workpoint_progress[workpoint_id]['total'] += 1
-            
-            if step['status'] == 'completed':
-                workpoint_progress[workpoint_id]['completed'] += 1
-            elif step['status'] == 'available':
-                # 记录当前可执行的最小order
-                current_order = workpoint_progress[workpoint_id]['current_order']
-                if current_order == 0 or step['order'] < current_order:
-                    workpoint_progress[workpoint_id]['current_order'] = step['order']
-        
-        return workpoint_progress
+        """获取各工作点的当前进度（按工作点下标排列的完成比例）"""
+        return self.env.workpoint_completed / self.env._workpoint_divisor
+
+    def _calculate_improved_greedy_score(self, i, workers, workpoint_progress):
+        """
+        在基础贪婪评分上加入工作点负载均衡：进度越落后的工作点加分越多
+
+        Args:
+            i: 工序下标
+            workers: 分配人数
+            workpoint_progress: 各工作点完成比例（按工作点下标）
+        """
+        step = self.env.work_steps[i]
+        balance_score = (1.0 - workpoint_progress[self.env.step_workpoint[i]]) * 20
+        return self._calculate_greedy_score(step, workers) + balance_score
     
     def _calculate_greedy_score(self, step, workers):
         """
@@ -153,18 +147,18 @@ class GreedyScheduler:
         4. 团队效率
         """
         # 基础评分：工序优先级（order越小分数越高）
-        priority_score = 100 / (step["order"] + 1)
+        priority_score = 100 / (step.order + 1)
         
         # 工人数量评分（归一化到0-50）
-        team_size = step["team_size"]
+        team_size = step.team_size
         worker_score = (workers / team_size) * 50
         
         # 持续时间评分（越短越好，归一化到0-30）
-        duration = step["duration"]
+        duration = step.duration
         duration_score = max(0, 30 - duration)
         
         # 专用团队加分
-        dedicated_bonus = 20 if step["dedicated"] else 0
+        dedicated_bonus = 20 if step.dedicated else 0
         
         # 总评分
         total_score = priority_score + worker_score + duration_score + dedicated_bonus
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+标识符整数化模块 - 将工序、团队和工作点的字符串ID映射为连续整数下标
+
+环境、贪婪调度器等内部计算一律使用整数下标，字符串ID只在数据库、JSON和图表等
+边界处使用。
+"""
+
+
+class IdInterner(dict):
+    """
+    字符串ID到连续整数下标的双向映射
+
+    本身是 {ID: 下标} 字典（查找走dict的C实现），ids列表按下标保存原始ID。
+    下标从0开始按首次出现的顺序分配，已分配的下标不会改变。
+    """
+
+    __slots__ = ("ids",)
+
+    def __init__(self, ids=()):
+        super().__init__()
+        self.ids = []
+        for key in ids:
+            self.intern(key)
+
+    def intern(self, key):
+        """返回key的下标，首次出现时分配新下标"""
+        index = self.get(key)
+        if index is None:
+            index = len(self.ids)
+            self[key] = index
+            self.ids.append(key)
+        return index
+
+    def key(self, index):
+        """返回下标对应的原始ID"""
+        return self.ids[index]
@@ -18,6 +18,8 @@ from scheduling_environment import FactoryEnvironment, create_sample_workpoints_
 from ddqn_algorithm import train_ddqn_agent, run_best_schedule
 from visualization import save_gantt_charts
 from global_best_tracker import global_best_tracker
+from run_metrics import RunMetrics
+from profiling import profiled, resolve_profile_mode
 # 导入数据库连接器
 from db_connector import DatabaseConnector
 
@@ -103,40 +105,57 @@ def find_best_schedule_from_runs(env, num_runs=10):
     return best_final_schedule, best_final_makespan
 
 
-def RUN(workpoints_data, save_processes_to_db=True):
+def RUN(workpoints_data, save_processes_to_db=True, profile=None):
     """
     多工作点调度算法主函数 - 集成全局最优跟踪
     
     Args:
         workpoints_data: 工作点数据字典
         save_processes_to_db: 是否将工序数据保存到数据库（默认True）
+        profile: 是否剖析整个流程（见profiling.resolve_profile_mode，默认由环境变量DDQN_PROFILE决定）
+
+    Returns:
+        (record, process_fig, workpoint_fig, team_fig, timings)，失败时为(None, None)。
+        timings为各阶段耗时、每轮训练耗时和计数器（见RunMetrics.to_dict），
+        同时以一行JSON输出到日志
     """
+    # 解析后的剖析方式同时传给训练，显式关闭时不再由环境变量重新开启
+    profile = resolve_profile_mode(profile) or False
+    with profiled("RUN", profile):
+        return _run(workpoints_data, save_processes_to_db, profile)
+
+
+def _run(workpoints_data, save_processes_to_db, profile=False):
+    """RUN的实际流程（profile为已解析的剖析方式，False表示不剖析）"""
     print("🚀 开始多工作点调度算法...")
     start_time = time.time()
+    metrics = RunMetrics()
     
     # 1. 保存工序数据到数据库（如果需要）
     if save_processes_to_db:
         print("\n💾 第一步：保存工序数据到数据库...")
-        db = DatabaseConnector(
-            host="localhost",
-            user="root",
-            password="123456",
-            database="secret"
-        )
-        
-        if db.connect():
-            # 保存所有工作点的工序数据
-            db.save_all_workpoints_processes(workpoints_data, clear_existing=True)
-            db.close()
-        else:
-            print("⚠️  数据库连接失败，跳过工序数据保存")
+        with metrics.phase("db_save_processes"):
+            db = DatabaseConnector(
+                host="localhost",
+                user="root",
+                password="123456",
+                database="secret"
+            )
+            
+            if db.connect():
+                # 保存所有工作点的工序数据
+                db.save_all_workpoints_processes(workpoints_data, clear_existing=True)
+                db.close()
+            else:
+                print("⚠️  数据库连接失败，跳过工序数据保存")
     
     # 设置随机种子
     set_random_seeds()
     
     # 2. 加载已有的全局最优结果（如果存在）
     print("\n📂 第二步：检查已有的全局最优结果...")
-    global_best_tracker.load_global_best()
+    with metrics.phase("global_best_load"):
+        global_best_tracker.load_global_best()
     initial_best = global_best_tracker.get_best_result()
     
     if initial_best['makespan'] != float('inf'):
@@ -150,8 +169,10 @@ def RUN(workpoints_data, save_processes_to_db=True):
     
     # 3. 训练DDQN代理
     print("\n📚 第三步：开始训练DDQN代理...")
-    env = FactoryEnvironment(workpoints_data)
-    agent, env, best_schedule, rewards, makespans = train_ddqn_agent(env, workpoints_data)
+    with metrics.phase("env_build"):
+        env = FactoryEnvironment(workpoints_data)
+    with metrics.phase("training"):
+        agent, env, best_schedule, rewards, makespans = train_ddqn_agent(env, workpoints_data, metrics, profile)
     
     # 打印训练结果
     valid_makespans = [m for m in makespans if m is not None and m != float('inf')]
@@ -181,6 +202,7 @@ def RUN(workpoints_data, save_processes_to_db=True):
     
     if current_best['makespan'] == float('inf'):
         print("❌ 未找到任何有效的调度结果")
+        metrics.log()
         return None, None
     
     # 使用全局最优结果
@@ -202,7 +224,10 @@ def RUN(workpoints_data, save_processes_to_db=True):
     
     try:
         # 生成三张独立的甘特图
-        record, process_fig, workpoint_fig, team_fig = save_gantt_charts(final_schedule, final_makespan, env)
+        with metrics.phase("charts"):
+            record, process_fig, workpoint_fig, team_fig = save_gantt_charts(
+                final_schedule, final_makespan, env, metrics
+            )
     
         
         # 打印调度详情
@@ -211,28 +236,31 @@ def RUN(workpoints_data, save_processes_to_db=True):
 
         # 保存结果到数据库
         print("\n💾 保存结果到数据库...")
-        db = DatabaseConnector(
-            host="localhost", 
-            user="root", 
-            password="123456",  # 替换为你的MySQL密码
-            database="secret"
-        )
-        
-        if db.connect():
-            # 保存调度记录
-            db.save_task_schedule(record)
-            # 关闭数据库连接
-            db.close()
+        with metrics.phase("db_write"):
+            db = DatabaseConnector(
+                host="localhost", 
+                user="root", 
+                password="123456",  # 替换为你的MySQL密码
+                database="secret"
+            )
+            
+            if db.connect():
+                # 保存调度记录
+                db.save_task_schedule(record)
+                # 关闭数据库连接
+                db.close()
         
         # 打印全局最优摘要
         # global_best_tracker.print_summary()
         
-        return record, process_fig, workpoint_fig, team_fig
+        timings = metrics.log()
+        return record, process_fig, workpoint_fig, team_fig, timings
         
     except Exception as e:
         print(f"❌ 可视化生成失败: {e}")
         import traceback
         traceback.print_exc()
+        metrics.log()
         return None, None
 
 
@@ -279,7 +307,7 @@ def main(use_database=True):
         print(f"  {wp_name}: {step_count} 个工序" + ("（使用标准模板）" if step_count == 0 else ""))
     
     # 运行调度算法（不再重复保存工序到数据库）
-    record, process_fig, workpoint_fig, team_fig = RUN(workpoints_data, save_processes_to_db=False)
+    record, process_fig, workpoint_fig, team_fig, timings = RUN(workpoints_data, save_processes_to_db=False)
     
     print("\n" + "=" * 60)
     print("调度算法执行完成!")
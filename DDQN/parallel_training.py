@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+多进程训练模块 - N个actor进程采集经验，主进程作为learner训练
+
+每个actor进程持有自己的FactoryEnvironment和策略网络副本，按共享内存中的最新权重和
+探索率运行episode，把经验分块通过队列（管道）发送给learner。learner拥有回放缓冲区和
+优化器：取出经验写入缓冲区，并在接收下一条消息前执行完对应的经验回放更新（更新次数与
+单进程训练相同，按agent的训练时机配置由收到的经验数和episode数决定，learner跟不上时
+有界队列写满使actor等待），每actor_sync_interval次更新把策略网络权重写入共享内存供actor同步。全部在本机完成，不需要网络或外部消息中间件。
+
+通过DDQN_CONFIG["num_actors"] > 1 启用（见ddqn_algorithm.train_ddqn_agent）。
+"""
+
+import os
+import queue
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from tqdm import tqdm
+
+from config import DDQN_CONFIG, ENVIRONMENT_CONFIG
+
+
+def _actor_main(actor_id, workpoints_data, ddqn_config, environment_config, shared_net, weights_version,
+                weights_lock, epsilon, stop_event, transitions, seed):
+    """
+    actor进程入口
+
+    Args:
+        shared_net: 共享内存中的策略网络（learner定期写入最新权重）
+        weights_version: 共享权重的版本号，版本变化时actor重新同步
+        epsilon: learner当前的探索率（按learner收到的环境步数/episode数调度）
+        transitions: 发送经验和episode结果的队列
+    """
+    # 子进程（spawn）重新导入配置，使用父进程运行时的配置
+    DDQN_CONFIG.update(ddqn_config)
+    ENVIRONMENT_CONFIG.update(environment_config)
+    from scheduling_environment import FactoryEnvironment
+    from ddqn_algorithm import create_agent
+
+    torch.set_num_threads(1)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    # 环境的逐步提示信息在actor中不输出
+    sys.stdout = open(os.devnull, "w")
+
+    env = FactoryEnvironment(workpoints_data)
+    state_size = len(env.reset())
+    agent = create_agent(env, state_size, "cpu", prioritized=False)
+    agent.memory = None  # actor不保存经验
+    chunk_size = ddqn_config["actor_chunk_size"]
+    max_steps = ddqn_config["max_steps"]
+    synced_version = -1
+
+    while not stop_event.is_set():
+        if weights_version.value != synced_version:
+            with weights_lock:
+                agent.policy_net.load_state_dict(shared_net.state_dict())
+                synced_version = weights_version.value
+
+        episode_start = time.perf_counter()
+        agent.epsilon = epsilon.value
+        state = env.reset()
+        valid_actions = env.get_valid_actions()
+        encoded = agent.encode(env, valid_actions)
+        valid_action_calls = 1
+        total_reward = 0.0
+        done = False
+        step_counter = 0
+        chunk = []
+
+        while not done and step_counter < max_steps and not stop_event.is_set():
+            if not valid_actions:
+                break
+            action_idx = agent.act(state, encoded)
+            next_state, reward, done = env.step(valid_actions[action_idx])
+            valid_actions = env.get_valid_actions()
+            valid_action_calls += 1
+            next_encoded = agent.encode(env, valid_actions)
+
+            chunk.append((state, encoded[action_idx], next_state, reward, done, next_encoded))
+            if len(chunk) >= chunk_size:
+                transitions.put(("transitions", chunk))
+                chunk = []
+
+            state = next_state
+            encoded = next_encoded
+            total_reward += reward
+            step_counter += 1
+
+        if chunk:
+            transitions.put(("transitions", chunk))
+        if stop_event.is_set():
+            break
+        makespan = env.get_makespan()
+        schedule = env.get_schedule() if makespan != float('inf') else None
+        transitions.put(("episode", {
+            "actor": actor_id,
+            "reward": total_reward,
+            "makespan": makespan,
+            "schedule": schedule,
+            "steps": step_counter,
+            "valid_action_calls": valid_action_calls,
+            "seconds": time.perf_counter() - episode_start,
+        }))
+
+
+def train_parallel(env, agent, num_actors, metrics=None, update_global_best=None):
+    """
+    用num_actors个actor进程采集经验，在当前进程中训练agent
+
+    Args:
+        env: 调度环境（actor按其工作点数据构建各自的环境）
+        agent: learner的智能体（拥有回放缓冲区和优化器）
+        update_global_best: 发现更优结果时的回调(schedule, makespan, episode)
+
+    Returns:
+        (episode_rewards, episode_makespans, best_schedule)
+    """
+    episodes = DDQN_CONFIG["episodes"]
+    sync_interval = DDQN_CONFIG["actor_sync_interval"]
+
+    ctx = mp.get_context("spawn")
+    shared_net = agent._create_network()
+    shared_net.load_state_dict(agent.policy_net.state_dict())
+    shared_net.share_memory()
+    weights_version = ctx.Value("l", 0)
+    weights_lock = ctx.Lock()
+    epsilon = ctx.Value("d", agent.epsilon)
+    stop_event = ctx.Event()
+    transitions = ctx.Queue(maxsize=DDQN_CONFIG["actor_queue_size"])
+
+    seed = np.random.randint(0, 2 ** 31 - 1)
+    actors = [
+        ctx.Process(
+            target=_actor_main,
+            args=(k, env.workpoints, dict(DDQN_CONFIG), dict(ENVIRONMENT_CONFIG), shared_net, weights_version,
+                  weights_lock, epsilon, stop_event, transitions, seed + k),
+            daemon=True,
+        )
+        for k in range(num_actors)
+    ]
+    for actor in actors:
+        actor.start()
+
+    episode_rewards = []
+    episode_makespans = []
+    best_makespan = float('inf')
+    best_schedule = None
+    received = 0
+    update_budget = 0  # 尚未执行的回放更新次数
+    updates_since_sync = 0
+
+    progress = tqdm(total=episodes, desc="Training Progress", ncols=100)
+    try:
+        while len(episode_makespans) < episodes:
+            # 先执行完已接收经验对应的全部更新，再接收下一条消息；
+            # learner跟不上时有界队列写满，actor等待
+            if update_budget > 0:
+                agent.replay()
+                update_budget -= 1
+                updates_since_sync += 1
+                if updates_since_sync >= sync_interval:
+                    with weights_lock:
+                        shared_net.load_state_dict(agent.policy_net.state_dict())
+                        weights_version.value += 1
+                    updates_since_sync = 0
+                continue
+
+            try:
+                kind, payload = transitions.get(timeout=1.0)
+            except queue.Empty:
+                if not any(actor.is_alive() for actor in actors):
+                    raise RuntimeError("所有actor进程都已退出")
+                continue
+
+            if kind == "transitions":
+                for transition in payload:
+                    agent.remember(*transition)
+                agent.advance_exploration(env_steps=len(payload))
+                epsilon.value = agent.epsilon
+                # 与单进程训练一致：缓冲区达到warmup_size前的更新不执行
+                updates = agent.count_updates(env_steps=len(payload))
+                if len(agent.memory) >= agent.warmup_size:
+                    update_budget += updates
+                received += len(payload)
+                continue
+
+            # 一个actor的episode结束
+            episode = len(episode_makespans)
+            makespan = payload["makespan"]
+            if makespan < best_makespan:
+                best_makespan = makespan
+                best_schedule = payload["schedule"]
+                print(f"Episode {episode}: 新的最佳完工时间 {best_makespan:.2f} (actor {payload['actor']})")
+                if update_global_best is not None:
+                    update_global_best(best_schedule, best_makespan, episode)
+            if episode % agent.update_freq == 0:
+                agent.update_target_network()
+            agent.advance_exploration(episodes=1)
+            epsilon.value = agent.epsilon
+            if len(agent.memory) >= agent.warmup_size:
+                update_budget += agent.count_updates(episodes=1)
+            episode_rewards.append(payload["reward"])
+            episode_makespans.append(makespan)
+            progress.update(1)
+            if metrics is not None:
+                metrics.record_episode(payload["seconds"])
+                metrics.count("env_steps", payload["steps"])
+                metrics.count("valid_action_calls", payload["valid_action_calls"])
+    finally:
+        progress.close()
+        stop_event.set()
+        # 清空队列，避免actor阻塞在put上无法退出
+        deadline = time.time() + 10
+        while any(actor.is_alive() for actor in actors) and time.time() < deadline:
+            try:
+                transitions.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for actor in actors:
+            if actor.is_alive():
+                actor.terminate()
+            actor.join()
+
+    # 执行最后收到的经验对应的剩余更新
+    for _ in range(update_budget):
+        agent.replay()
+
+    print(f"actor进程数: {num_actors}, 共接收 {received} 条经验, learner更新 {agent.replay_updates} 次")
+    if metrics is not None:
+        metrics.count("transitions_received", received)
+    return episode_rewards, episode_makespans, best_schedule
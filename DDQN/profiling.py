@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+性能剖析模块 - 可选地用cProfile或pyinstrument包裹调度流程
+
+默认关闭，不产生任何额外开销。开启方式（不需要修改代码）:
+    环境变量  DDQN_PROFILE=1 / cprofile / pyinstrument
+    请求参数  /run_ddqn 请求体中的 "profile": true / "cprofile" / "pyinstrument"
+             （显式的 "profile": false 会覆盖环境变量）
+
+cProfile结果写入 result/profile_<名称>_<时间>_<进程号>.prof，可用snakeviz、flameprof或
+pstats查看；pyinstrument结果写入同名的.speedscope.json（speedscope火焰图）和.html。
+热点摘要的行数由环境变量 DDQN_PROFILE_TOP 指定（默认20）。
+"""
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import time
+
+from config import get_result_path
+
+
+PROFILE_ENV_VAR = "DDQN_PROFILE"
+PROFILE_TOP_ENV_VAR = "DDQN_PROFILE_TOP"
+DEFAULT_TOP_N = 20
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+# 当前是否已有剖析在进行（嵌套调用时只由最外层剖析）
+_active = False
+
+
+def resolve_profile_mode(flag=None):
+    """
+    确定剖析方式
+
+    Args:
+        flag: 请求参数，None表示由环境变量决定；True使用环境变量指定的工具（默认cprofile）；
+            False关闭；字符串直接指定工具
+
+    Returns:
+        "cprofile"、"pyinstrument"，或None表示不剖析
+    """
+    env_value = os.environ.get(PROFILE_ENV_VAR, "").strip().lower()
+    if flag is None:
+        flag = env_value not in ("", "0", "false", "off", "no")
+    if flag is False:
+        return None
+    if flag is True:
+        flag = env_value if env_value in PROFILERS else "cprofile"
+
+    mode = str(flag).strip().lower()
+    if mode not in PROFILERS:
+        raise ValueError(f"未知的剖析方式 {flag}，可选: {', '.join(PROFILERS)}")
+    return mode
+
+
+def profiled(name, flag=None):
+    """
+    剖析一段代码的上下文管理器，未开启时返回空上下文
+
+    Args:
+        name: 剖析名称（用于输出文件名和日志）
+        flag: 见resolve_profile_mode
+    """
+    mode = resolve_profile_mode(flag)
+    if mode is None or _active:
+        return contextlib.nullcontext()
+    if mode == "pyinstrument":
+        return _pyinstrument_profile(name)
+    return _cprofile_profile(name)
+
+
+def _output_path(name, suffix):
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    return get_result_path(f"profile_{name}_{timestamp}_{os.getpid()}{suffix}")
+
+
+def _top_n():
+    try:
+        return int(os.environ.get(PROFILE_TOP_ENV_VAR, DEFAULT_TOP_N))
+    except ValueError:
+        return DEFAULT_TOP_N
+
+
+@contextlib.contextmanager
+def _cprofile_profile(name):
+    global _active
+    profiler = cProfile.Profile()
+    _active = True
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        _active = False
+        path = _output_path(name, ".prof")
+        profiler.dump_stats(path)
+
+        top_n = _top_n()
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(top_n)
+        print(f"\n🔬 {name} 剖析结果已保存到: {path}")
+        print(f"前{top_n}个热点（按累计耗时）:")
+        print(stream.getvalue())
+
+
+@contextlib.contextmanager
+def _pyinstrument_profile(name):
+    global _active
+    try:
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import SpeedscopeRenderer
+    except ImportError:
+        print("⚠️  未安装pyinstrument，改用cProfile")
+        with _cprofile_profile(name) as profiler:
+            yield profiler
+        return
+
+    profiler = Profiler()
+    _active = True
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active = False
+        path = _output_path(name, ".speedscope.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.output(renderer=SpeedscopeRenderer()))
+        html_path = path.replace(".speedscope.json", ".html")
+        with open(html_path, "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+        print(f"\n🔬 {name} 剖析结果已保存到: {path} / {html_path}")
+        print(profiler.output_text(unicode=True, show_all=False))
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+经验回放模块 - 均匀采样的环形缓冲区和基于求和树(sum-tree)的优先经验回放
+
+ReplayBuffer保存动作目录网络的经验(状态, 动作槽位, ...)，CandidateReplayBuffer保存
+候选评分网络的经验(所选候选的特征, ..., 下一状态全部候选的特征)。缓冲区都把经验保存在
+预分配的NumPy数组中，采样时用向量化的下标索引取出整个批次。
+"""
+
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    经验回放缓冲区
+
+    经验保存在预分配的NumPy数组中（环形缓冲区，写满后覆盖最旧的经验），
+    采样时用一次向量化的下标索引取出整个批次。动作以动作目录的槽位保存，
+    下一状态的有效动作槽位在采样时展开为掩码，供DDQN目标值使用。
+    """
+
+    def __init__(self, capacity, state_size, num_actions):
+        """
+        Args:
+            capacity: 最多保存的经验条数
+            state_size: 状态维度
+            num_actions: 动作目录的槽位数（下一状态有效动作掩码的宽度）
+        """
+        self.capacity = capacity
+        self.num_actions = num_actions
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.action_idxs = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        # 下一状态有效动作的槽位（长度不定，每条经验一个数组）
+        self.next_slots = np.empty(capacity, dtype=object)
+        self.next_slot_counts = np.zeros(capacity, dtype=np.int64)
+        self.position = 0  # 下一条经验的写入位置
+        self.size = 0
+
+    def _next_index(self):
+        """返回写入位置并前移（写满后覆盖最旧的经验）"""
+        i = self.position
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def push(self, state, action_idx, next_state, reward, done, next_slots):
+        i = self._next_index()
+        self.states[i] = state
+        self.action_idxs[i] = action_idx
+        self.next_states[i] = next_state
+        self.rewards[i] = reward
+        self.dones[i] = done
+        next_slots = next_slots[next_slots >= 0]
+        self.next_slots[i] = next_slots
+        self.next_slot_counts[i] = len(next_slots)
+        return i
+
+    def _batch(self, idx):
+        next_masks = np.zeros((len(idx), self.num_actions), dtype=bool)
+        counts = self.next_slot_counts[idx]
+        if counts.any():
+            rows = np.repeat(np.arange(len(idx)), counts)
+            next_masks[rows, np.concatenate(self.next_slots[idx])] = True
+        return (self.states[idx], self.action_idxs[idx], self.rewards[idx],
+                self.next_states[idx], self.dones[idx], next_masks)
+
+    def sample(self, batch_size):
+        """
+        随机采样一个批次
+
+        Returns:
+            (states, action_idxs, rewards, next_states, dones, next_masks)数组元组，
+            next_masks为(batch_size, num_actions)的下一状态有效动作掩码
+        """
+        idx = np.random.randint(0, self.size, size=batch_size)
+        return self._batch(idx)
+
+    def __len__(self):
+        return self.size
+
+
+class CandidateReplayBuffer(ReplayBuffer):
+    """
+    候选评分网络的经验回放缓冲区
+
+    每条经验保存所选候选动作的特征行、奖励、是否结束，以及下一状态全部候选动作的特征
+    （行数不定）。采样时把下一状态的候选补齐为(B, K, feature_size)数组和(B, K)掩码，
+    K为批次内的最大候选数。
+    """
+
+    def __init__(self, capacity, feature_size):
+        self.capacity = capacity
+        self.feature_size = feature_size
+        self.features = np.zeros((capacity, feature_size), dtype=np.float32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.next_features = np.empty(capacity, dtype=object)
+        self.next_counts = np.zeros(capacity, dtype=np.int64)
+        self.position = 0  # 下一条经验的写入位置
+        self.size = 0
+
+    def push(self, features, reward, done, next_features):
+        i = self._next_index()
+        self.features[i] = features
+        self.rewards[i] = reward
+        self.dones[i] = done
+        self.next_features[i] = next_features
+        self.next_counts[i] = len(next_features)
+        return i
+
+    def _batch(self, idx):
+        counts = self.next_counts[idx]
+        width = max(int(counts.max()), 1)
+        next_features = np.zeros((len(idx), width, self.feature_size), dtype=np.float32)
+        next_masks = np.zeros((len(idx), width), dtype=bool)
+        if counts.any():
+            rows = np.repeat(np.arange(len(idx)), counts)
+            # 每个候选在所属经验内的序号
+            cols = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+            next_features[rows, cols] = np.concatenate(self.next_features[idx])
+            next_masks[rows, cols] = True
+        return self.features[idx], self.rewards[idx], self.dones[idx], next_features, next_masks
+
+    def sample(self, batch_size):
+        """
+        随机采样一个批次
+
+        Returns:
+            (features, rewards, dones, next_features, next_masks)数组元组
+        """
+        return super().sample(batch_size)
+
+
+class SumTree:
+    """
+    求和树：叶子保存每条经验的优先级，内部节点保存子树优先级之和
+
+    叶子数补齐为2的幂，所有叶子位于同一层，因此批量采样和批量更新都可以
+    逐层向量化完成，复杂度为O(log n)。
+    """
+
+    def __init__(self, capacity):
+        self.num_leaves = 1
+        while self.num_leaves < capacity:
+            self.num_leaves *= 2
+        # 下标1为根节点，节点k的子节点为2k和2k+1，叶子为[num_leaves, 2*num_leaves)
+        self.tree = np.zeros(2 * self.num_leaves, dtype=np.float64)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def update(self, data_idx, priorities):
+        """把data_idx（下标数组）位置的优先级设为priorities，并更新所有祖先节点"""
+        nodes = np.asarray(data_idx, dtype=np.int64) + self.num_leaves
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        """返回前缀和落在values处的叶子下标（values为[0, total)内的数组）"""
+        tree = self.tree
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        while nodes[0] < self.num_leaves:
+            left = 2 * nodes
+            left_sum = tree[left]
+            go_right = values >= left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.num_leaves
+
+    def priorities(self, data_idx):
+        return self.tree[np.asarray(data_idx) + self.num_leaves]
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    优先经验回放缓冲区
+
+    经验i被采样的概率为 p_i^alpha / sum_k p_k^alpha，p_i为最近一次的|TD误差| + epsilon，
+    新经验使用当前最大优先级以保证至少被采样一次。采样同时返回重要性采样权重
+    (N * P(i))^-beta / max_j w_j，beta每次采样增加beta_increment直到1。
+    """
+
+    def __init__(self, capacity, *args, alpha=0.6, beta=0.4, beta_increment=0.001, epsilon=1e-6):
+        super().__init__(capacity, *args)
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+
+    def push(self, *experience):
+        i = super().push(*experience)
+        self.tree.update([i], self.max_priority ** self.alpha)
+        return i
+
+    def sample(self, batch_size):
+        """
+        按优先级分层采样一个批次
+
+        Returns:
+            基础缓冲区的批次元组后追加(idx, weights)，idx用于update_priorities，
+            weights为float32的重要性采样权重
+        """
+        total = self.tree.total
+        # 把[0, total)等分为batch_size段，每段内均匀采样一个前缀和
+        bounds = np.linspace(0.0, total, batch_size + 1)
+        values = np.random.uniform(bounds[:-1], bounds[1:])
+        idx = np.minimum(self.tree.find(values), self.size - 1)
+
+        probabilities = np.maximum(self.tree.priorities(idx), self.epsilon ** self.alpha) / total
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        return self._batch(idx) + (idx, weights.astype(np.float32))
+
+    def update_priorities(self, idx, td_errors):
+        """用新的|TD误差|更新采样经验的优先级"""
+        priorities = np.abs(td_errors) + self.epsilon
+        # 同一批次中重复采样的经验以最后一次为准
+        self.tree.update(idx, priorities ** self.alpha)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+
+class PrioritizedCandidateReplayBuffer(PrioritizedReplayBuffer, CandidateReplayBuffer):
+    """候选评分网络的优先经验回放缓冲区"""
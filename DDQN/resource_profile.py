@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+团队资源曲线模块 - 记录共用团队随时间变化的占用人数
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+class TeamResourceProfile:
+    """
+    团队占用人数的分段常数函数
+
+    times为按升序排列的断点，levels[i]为区间[times[i], times[i+1])内的占用人数，
+    第一个断点之前占用为0。工序开始时加入[start, end)区间，完成时移除。
+    断点通过二分定位，查询只扫描落在查询区间内的断点。
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = []
+        self.levels = []
+
+    def copy(self):
+        """复制资源曲线"""
+        profile = TeamResourceProfile(self.capacity)
+        profile.times = self.times[:]
+        profile.levels = self.levels[:]
+        return profile
+
+    def _ensure_breakpoint(self, t):
+        """确保t是断点，返回其下标"""
+        i = bisect_left(self.times, t)
+        if i < len(self.times) and self.times[i] == t:
+            return i
+        level = self.levels[i - 1] if i > 0 else 0
+        self.times.insert(i, t)
+        self.levels.insert(i, level)
+        return i
+
+    def _compact(self):
+        """合并占用人数相同的相邻分段"""
+        times, levels = [], []
+        previous = 0
+        for t, level in zip(self.times, self.levels):
+            if level != previous:
+                times.append(t)
+                levels.append(level)
+                previous = level
+        self.times = times
+        self.levels = levels
+
+    def add(self, start, end, workers):
+        """在[start, end)区间内占用workers人"""
+        if end <= start or workers == 0:
+            return
+        i = self._ensure_breakpoint(start)
+        j = self._ensure_breakpoint(end)
+        for k in range(i, j):
+            self.levels[k] += workers
+
+    def remove(self, start, end, workers):
+        """释放[start, end)区间内占用的workers人"""
+        self.add(start, end, -workers)
+        self._compact()
+
+    def usage_at(self, t):
+        """时间点t的占用人数"""
+        i = bisect_right(self.times, t) - 1
+        return self.levels[i] if i >= 0 else 0
+
+    def changes_between(self, start, end):
+        """区间(start, end]内是否存在断点，即两个时间点的占用人数可能不同"""
+        i = bisect_right(self.times, start)
+        return i < len(self.times) and self.times[i] <= end
+
+    def max_usage(self, start, end):
+        """区间[start, end)内的最大占用人数"""
+        if end <= start:
+            return 0
+        i = bisect_right(self.times, start) - 1
+        max_level = self.levels[i] if i >= 0 else 0
+        k = i + 1
+        while k < len(self.times) and self.times[k] < end:
+            if self.levels[k] > max_level:
+                max_level = self.levels[k]
+            k += 1
+        return max_level
+
+    def earliest_fit(self, workers, duration, not_before=0):
+        """
+        不早于not_before、能连续duration时间空出workers人的最早开始时间
+
+        Returns:
+            最早开始时间；容量不足以容纳workers人时返回inf
+        """
+        if workers > self.capacity:
+            return float('inf')
+        limit = self.capacity - workers
+        t = not_before
+        while True:
+            i = bisect_right(self.times, t) - 1
+            if i >= 0 and self.levels[i] > limit:
+                # 当前分段已超员，从下一个断点重新尝试
+                if i + 1 >= len(self.times):
+                    return float('inf')
+                t = self.times[i + 1]
+                continue
+            k = i + 1
+            while k < len(self.times) and self.times[k] < t + duration:
+                if self.levels[k] > limit:
+                    break
+                k += 1
+            else:
+                return t
+            if k + 1 >= len(self.times):
+                return float('inf')
+            t = self.times[k + 1]
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+运行指标模块 - 记录调度流程各阶段耗时、每轮训练耗时和计数器
+"""
+
+import contextlib
+import json
+import time
+
+
+class RunMetrics:
+    """
+    一次调度运行的分阶段计时和计数
+
+    phases为各阶段累计耗时（秒），同名阶段多次进入时累加；episodes为每轮训练耗时；
+    counters为环境步数、经验回放更新次数等计数。
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.phases = {}
+        self.episodes = []
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """计时一个阶段（异常时同样记录耗时）"""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def record_episode(self, seconds):
+        """记录一轮训练的耗时"""
+        self.episodes.append(seconds)
+
+    def count(self, name, n=1):
+        """计数器name加n"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self):
+        """结构化的计时结果（可直接JSON序列化）"""
+        episodes = self.episodes
+        return {
+            "total_s": time.perf_counter() - self.start_time,
+            "phases": dict(self.phases),
+            "episodes": {
+                "count": len(episodes),
+                "total_s": sum(episodes),
+                "mean_s": sum(episodes) / len(episodes) if episodes else 0.0,
+                "max_s": max(episodes) if episodes else 0.0,
+            },
+            "counters": dict(self.counters),
+        }
+
+    def log(self, event="run_timings"):
+        """以一行JSON输出计时结果，返回该结果字典"""
+        timings = self.to_dict()
+        print(json.dumps({"event": event, **timings}, ensure_ascii=False))
+        return timings
+
+
+def phase(metrics, name):
+    """metrics为None时返回空上下文，便于可选地计时"""
+    if metrics is None:
+        return contextlib.nullcontext()
+    return metrics.phase(name)
@@ -3,278 +3,745 @@
 调度环境模块 - 包含工厂环境和调度逻辑
 """
 
+import copy
+import heapq
+from collections.abc import MutableMapping
+from operator import itemgetter
 import numpy as np
-from config import TEAMS_CONFIG, STANDARD_STEP_TEMPLATES, ALLOCATION_CONFIG
+from resource_profile import TeamResourceProfile
+from id_interning import IdInterner
+from step_model import Step, StepTable, DEFAULT_TEMPLATE_DURATIONS
+from config import TEAMS_CONFIG, STANDARD_STEP_TEMPLATES, ALLOCATION_CONFIG, ENVIRONMENT_CONFIG
+
+# 调度生成方式: timeline为逐步推进时间，active/non_delay为按最早可行开始时间生成调度
+SCHEDULE_MODES = ("timeline", "active", "non_delay")
+
+
+def compute_adjusted_duration(base_duration, team_size, workers):
+    """按分配人数计算工序实际耗时（人数越多越快，但存在效率衰减和协作开销）"""
+    efficiency = 0.6 + 0.4 * (workers / team_size)
+    collaboration_bonus = 1.0 - 0.2 * (workers / team_size) ** 0.5
+    return base_duration * (team_size / workers) * efficiency * collaboration_bonus
+
+
+class StepArrayView(MutableMapping):
+    """以工序ID读写按工序下标存储的NumPy数组的字典兼容视图"""
+
+    __slots__ = ("_array", "_position")
+
+    def __init__(self, array, position):
+        self._array = array
+        self._position = position
+
+    def __getitem__(self, step_id):
+        return self._array[self._position[step_id]].item()
+
+    def __setitem__(self, step_id, value):
+        self._array[self._position[step_id]] = value
+
+    def __delitem__(self, step_id):
+        raise TypeError("工序数组视图不支持删除")
+
+    def __iter__(self):
+        return iter(self._position)
+
+    def __len__(self):
+        return len(self._position)
 
 
 class FactoryEnvironment:
     """多工作点工厂调度环境"""
     
-    def __init__(self, workpoints_data):
+    def __init__(self, workpoints_data, advance_all_simultaneous=None, cache_valid_actions=None,
+                 schedule_mode=None):
         """
         初始化多工作点工厂环境
         
         Args:
             workpoints_data: 字典格式，包含多个工作点的工序信息
+            advance_all_simultaneous: 推进时间时是否一次处理同一时刻的所有完成事件
+                （默认读取ENVIRONMENT_CONFIG）
+            cache_valid_actions: 是否按团队和工作点缓存get_valid_actions的候选动作
+                （默认读取ENVIRONMENT_CONFIG）
+            schedule_mode: 调度生成方式（默认读取ENVIRONMENT_CONFIG）
+                - "timeline": 工序只能在当前时间开始，需要推进时间动作等待资源
+                - "active": 每个(工序, 人数)候选带有由资源曲线算出的最早可行开始时间，
+                  选择后时间直接跳到该开始时间（活动调度生成）
+                - "non_delay": 同active，但只保留最早开始时间最小的候选（无延迟调度生成）
         """
+        if advance_all_simultaneous is None:
+            advance_all_simultaneous = ENVIRONMENT_CONFIG["advance_all_simultaneous"]
+        self.advance_all_simultaneous = advance_all_simultaneous
+        if cache_valid_actions is None:
+            cache_valid_actions = ENVIRONMENT_CONFIG["cache_valid_actions"]
+        self.cache_valid_actions = cache_valid_actions
+        if schedule_mode is None:
+            schedule_mode = ENVIRONMENT_CONFIG["schedule_mode"]
+        if schedule_mode not in SCHEDULE_MODES:
+            raise ValueError(f"未知的调度生成方式 {schedule_mode}，可选: {', '.join(SCHEDULE_MODES)}")
+        self.schedule_mode = schedule_mode
+
         # 存储工作点信息
         self.workpoints = workpoints_data
         self.workpoint_ids = list(workpoints_data.keys())
         
         # 标准工序模板（用于生成默认工序）
         self.standard_step_templates = STANDARD_STEP_TEMPLATES.copy()
+
+        # 团队配置：团队下标按TEAMS_CONFIG的顺序分配，可用人数随调度变化
+        self.team_position = IdInterner(TEAMS_CONFIG)
+        self.team_ids = self.team_position.ids
+        self.team_sizes = np.array([TEAMS_CONFIG[team]["size"] for team in self.team_ids], dtype=np.int64)
+        self.team_dedicated = np.array([TEAMS_CONFIG[team]["dedicated"] for team in self.team_ids], dtype=bool)
+        self.team_available = self.team_sizes.copy()
         
         # 生成所有工作点的工序实例
         self.work_steps = self._generate_workpoint_steps()
+
+        # 工序索引：工序ID -> 工序实例，工作点ID -> 工序列表（工序实例为静态数据，reset后依然有效）
+        self._build_step_index()
         
         print(f"初始化完成: {len(self.workpoint_ids)}个工作点, 共{len(self.work_steps)}个工序实例")
 
-        # 团队配置
-        self.teams = TEAMS_CONFIG.copy()
+        # 实际耗时表：按(工序下标, 分配人数)预先计算，内层循环直接查表
+        self._build_duration_table()
 
-        # 记录每个队伍目前在各工序上分配的人数
-        self.team_allocations = {team: {} for team in self.teams}
+        # 记录每个队伍目前在各工序上分配的人数: [团队下标] -> {工序下标: 人数}
+        self.team_allocations = [{} for _ in self.team_ids]
 
-        # 工序状态: 0 = 未开始, 1 = 进行中, 2 = 已完成
-        self.step_status = {step["id"]: 0 for step in self.work_steps}
-        self.step_allocations = {step["id"]: 0 for step in self.work_steps}
-        self.step_max_allocations = {step["id"]: 0 for step in self.work_steps}
-        self.step_start_times = {step["id"]: 0 for step in self.work_steps}
-        self.step_end_times = {step["id"]: 0 for step in self.work_steps}
+        # 每个团队的占用人数曲线（与team_allocations同步更新）
+        self.team_profiles = [TeamResourceProfile(size) for size in self.team_sizes.tolist()]
+
+        # 工序状态数组（按工序下标存储）: 0 = 未开始, 1 = 进行中, 2 = 已完成
+        num_steps = len(self.work_steps)
+        self._status = np.zeros(num_steps, dtype=np.int8)
+        self._allocations = np.zeros(num_steps, dtype=np.int64)
+        self._max_allocations = np.zeros(num_steps, dtype=np.int64)
+        self._start_times = np.zeros(num_steps, dtype=np.float64)
+        self._end_times = np.zeros(num_steps, dtype=np.float64)
+
+        # 以工序ID访问上述数组的字典兼容视图
+        self.step_status = StepArrayView(self._status, self.step_position)
+        self.step_allocations = StepArrayView(self._allocations, self.step_position)
+        self.step_max_allocations = StepArrayView(self._max_allocations, self.step_position)
+        self.step_start_times = StepArrayView(self._start_times, self.step_position)
+        self.step_end_times = StepArrayView(self._end_times, self.step_position)
 
         self.current_time = 0
-        self.events = []  # (step_id, completion_time)
+        # 事件优先队列: (completion_time, seq, 工序下标)，seq保证同时完成的工序按加入顺序出队
+        self.events = []
+        self._event_seq = 0
+
+        # 撤销日志：apply()执行动作时记录被修改字段的旧值，undo()按逆序恢复
+        self._undo_stack = []
+        self._undo_frame = None
+
+        # 候选动作缓存: {团队下标: {"workpoints": {工作点下标: 条目}, "dirty": 待重算的工作点下标}}
+        self._action_cache = {}
+        self._action_cache_stats = {"calls": 0, "hits": 0, "misses": 0}
+
+        # 前序约束：按order编译的工作点阶段DAG和就绪工序集合
+        self._build_precedence_dag()
+        self._reset_precedence_state()
+        self._reset_progress_counters()
+
+        # 状态向量缓冲区，静态特征只写入一次
+        self._build_state_buffer()
 
     def _generate_workpoint_steps(self):
-        """根据工作点数据生成所有工序实例"""
+        """根据工作点数据生成所有工序实例（不可变的Step记录）"""
         all_steps = []
         
         for workpoint_id, workpoint_data in self.workpoints.items():
             workpoint_name = workpoint_data.get("name", workpoint_id)
             steps_data = workpoint_data.get("steps", [])
+            default_durations = ()
             
-            # 如果工作点没有指定工序，使用标准模板
+            # 如果工作点没有指定工序，使用标准模板（缺少的持续时间取默认值）
             if not steps_data:
                 print(f"工作点 {workpoint_name} 未指定工序，使用标准模板")
-                steps_data = self.standard_step_templates.copy()
-                # 为标准模板添加默认持续时间
-                for i, step in enumerate(steps_data):
-                    if "duration" not in step:
-                        step["duration"] = [10, 5, 8, 6, 7, 9, 6, 7, 6, 7, 7, 7, 4, 7, 5][i]
+                steps_data = self.standard_step_templates
+                default_durations = DEFAULT_TEMPLATE_DURATIONS
             
             # 为每个工作点的工序创建实例
-            for step_template in steps_data:
-                step_instance = step_template.copy()
-                
-                # 生成唯一的工序ID
-                step_instance["id"] = f"{workpoint_id}_{step_template['name']}"
-                step_instance["workpoint_id"] = workpoint_id
-                step_instance["workpoint_name"] = workpoint_name
-                step_instance["original_name"] = step_template["name"]
-                
-                # 更新显示名称以包含工作点信息（简化显示）
-                wp_number = workpoint_name.replace("工作点", "").strip()
-                if not wp_number:
-                    wp_number = workpoint_id.split("_")[-1] if "_" in workpoint_id else workpoint_id
-                step_instance["display_name"] = f"{wp_number}-{step_template['name']}"
-
-                all_steps.append(step_instance)
+            for k, step_template in enumerate(steps_data):
+                duration = default_durations[k] if k < len(default_durations) else None
+                all_steps.append(Step.from_template(step_template, workpoint_id, workpoint_name, duration))
                 
             print(f"工作点 {workpoint_name}: 生成了 {len(steps_data)} 个工序")
         
         return all_steps
 
+    def _build_step_index(self):
+        """
+        构建工序、工作点的整数下标及工作点工序索引
+
+        step_position/workpoint_position/team_position把字符串ID映射为下标，
+        环境内部只使用下标，字符串ID仅用于输出调度结果和展示。
+        """
+        self.step_index = {step.id: step for step in self.work_steps}
+        self.workpoint_step_index = {workpoint_id: [] for workpoint_id in self.workpoint_ids}
+        for step in self.work_steps:
+            self.workpoint_step_index.setdefault(step.workpoint_id, []).append(step)
+
+        # 列式工序表：工序下标、所属工作点和团队的下标等按列存储
+        self.workpoint_position = IdInterner(self.workpoint_ids)
+        self.step_table = StepTable(self.work_steps, self.team_position, self.workpoint_position)
+        self.step_position = self.step_table.ids
+        self.step_workpoint = self.step_table.workpoint
+        self.step_team = self.step_table.team
+        self.workpoint_sizes = np.array(
+            [len(self.workpoint_step_index[workpoint_id]) for workpoint_id in self.workpoint_ids], dtype=np.int64
+        )
+
+    def _build_duration_table(self):
+        """
+        预计算每个工序在1..团队最大人数下的实际耗时
+
+        _duration_table[i][w]为工序i分配w人时的耗时，下标0占位不使用。
+        表中的值与compute_adjusted_duration逐位相同，问题规模不变时只需构建一次。
+        """
+        max_team_size = int(self.team_sizes.max())
+        self._duration_table = []
+        for step in self.work_steps:
+            base_duration = step.duration
+            team_size = step.team_size
+            max_workers = max(max_team_size, team_size)
+            self._duration_table.append([None] + [
+                compute_adjusted_duration(base_duration, team_size, workers)
+                for workers in range(1, max_workers + 1)
+            ])
+
+    def get_adjusted_duration(self, i, workers):
+        """工序下标i分配workers人时的实际耗时（超出表范围时直接计算）"""
+        row = self._duration_table[i]
+        if 0 < workers < len(row):
+            return row[workers]
+        step = self.work_steps[i]
+        return compute_adjusted_duration(step.duration, step.team_size, workers)
+
+    def _build_precedence_dag(self):
+        """
+        将order/parallel规则编译为每个工作点的阶段DAG
+
+        同一工作点内order相同的工序构成一个阶段，阶段按order递增排列；
+        某阶段的所有工序完成后才释放下一阶段。专用团队的并行工序额外记录
+        同团队的并行兄弟工序，兄弟工序进行中时不能开始。阶段中存放工序下标。
+        """
+        self.workpoint_stages = []
+        self.step_stage = np.zeros(len(self.work_steps), dtype=np.int64)
+        for workpoint_id in self.workpoint_ids:
+            workpoint_steps = self._get_workpoint_steps(workpoint_id)
+            orders = sorted(set(step.order for step in workpoint_steps))
+            stage_of_order = {order: k for k, order in enumerate(orders)}
+            stages = [[] for _ in orders]
+            for step in workpoint_steps:
+                i = self.step_position[step.id]
+                k = stage_of_order[step.order]
+                stages[k].append(i)
+                self.step_stage[i] = k
+            self.workpoint_stages.append(stages)
+
+        self.parallel_siblings = {}
+        for i, step in enumerate(self.work_steps):
+            if step.dedicated and step.parallel:
+                self.parallel_siblings[i] = [
+                    self.step_position[other.id] for other in self._get_workpoint_steps(step.workpoint_id)
+                    if other.id != step.id and other.parallel and other.team == step.team
+                ]
+
+    def _reset_precedence_state(self):
+        """重置阶段计数器，只释放每个工作点的第一阶段"""
+        self.stage_remaining = [[len(stage) for stage in stages] for stages in self.workpoint_stages]
+        self.released_stage = [0] * len(self.workpoint_stages)
+        self.ready_steps = set()
+        for stages in self.workpoint_stages:
+            if stages:
+                self.ready_steps.update(stages[0])
+
+    def _reset_progress_counters(self):
+        """重置各工作点及全局的已完成/进行中工序计数"""
+        self.workpoint_completed = np.zeros(len(self.workpoint_ids), dtype=np.int64)
+        self.workpoint_active = np.zeros(len(self.workpoint_ids), dtype=np.int64)
+        self.num_completed = 0
+        self.num_active = 0
+
+    def _mark_step_started(self, i):
+        """
+        工序开始：状态置为进行中，移出就绪集合并更新进度计数
+
+        按最早开始时间生成调度时，工序一经排定即释放后继阶段。
+
+        Returns:
+            (previous_frontier, released)，未释放阶段时为(None, [])
+        """
+        self._status[i] = 1
+        self.ready_steps.discard(i)
+        self.workpoint_active[self.step_workpoint[i]] += 1
+        self.num_active += 1
+        if self.schedule_mode != "timeline":
+            return self._release_stages(i)
+        return None, []
+
+    def _mark_step_completed(self, i):
+        """
+        工序完成：状态置为已完成；逐步推进时间时阶段计数减一，阶段清空时增量释放后继阶段
+
+        Returns:
+            (previous_frontier, released)，未释放阶段时为(None, [])
+        """
+        self._status[i] = 2
+        k = self.step_workpoint[i]
+        self.workpoint_active[k] -= 1
+        self.workpoint_completed[k] += 1
+        self.num_active -= 1
+        self.num_completed += 1
+        if self.schedule_mode == "timeline":
+            return self._release_stages(i)
+        return None, []
+
+    def _release_stages(self, i):
+        """工序i所在阶段计数减一，阶段清空时释放后继阶段，返回(previous_frontier, released)"""
+        k = self.step_workpoint[i]
+        stages = self.workpoint_stages[k]
+        remaining = self.stage_remaining[k]
+        remaining[self.step_stage[i]] -= 1
+
+        frontier = self.released_stage[k]
+        released = []
+        while frontier < len(stages) and remaining[frontier] == 0:
+            frontier += 1
+            if frontier < len(stages):
+                released.extend(j for j in stages[frontier] if self._status[j] == 0)
+        self.ready_steps.update(released)
+        previous_frontier = self.released_stage[k]
+        self.released_stage[k] = frontier
+        return previous_frontier, released
+
+    def _unrelease_stages(self, i, previous_frontier, released):
+        """撤销_release_stages"""
+        k = self.step_workpoint[i]
+        self.ready_steps.difference_update(released)
+        self.released_stage[k] = previous_frontier
+        self.stage_remaining[k][self.step_stage[i]] += 1
+
+    def _release_time(self, i):
+        """工序i的前序阶段全部完成的时间（其所有前序工序结束时间的最大值）"""
+        stage = self.step_stage[i]
+        if stage == 0:
+            return 0.0
+        stages = self.workpoint_stages[self.step_workpoint[i]]
+        return max(self._end_times[j] for previous in stages[:stage] for j in previous).item()
+
+    def _uses_profile(self, i):
+        """工序i是否登记在团队资源曲线中（共用团队总是登记，专用团队仅在按最早开始时间调度时登记）"""
+        return not self.work_steps[i].dedicated or self.schedule_mode != "timeline"
+
+    def _all_steps_completed(self):
+        """是否所有工序都已完成（O(1)计数判断）"""
+        return self.num_completed == len(self.work_steps)
+
+    def _push_event(self, i, completion_time):
+        """将工序完成事件加入优先队列"""
+        heapq.heappush(self.events, (completion_time, self._event_seq, i))
+        self._event_seq += 1
+
+    def _pop_event(self):
+        """弹出最早的完成事件"""
+        event = heapq.heappop(self.events)
+        if self._undo_frame is not None:
+            self._undo_frame.append(("pop", event))
+        return event
+
+    def _set_time(self, new_time):
+        """推进当前时间"""
+        if self._undo_frame is not None:
+            self._undo_frame.append(("time", self.current_time))
+        self._invalidate_time_actions(self.current_time, new_time)
+        self.current_time = new_time
+
     def _get_step_by_id(self, step_id):
         """根据工序ID获取工序实例"""
-        for step in self.work_steps:
-            if step["id"] == step_id:
-                return step
+        return self.step_index.get(step_id)
+
+    @property
+    def teams(self):
+        """团队状态字典 {团队ID: {"size", "dedicated", "available"}}，供展示等边界处使用"""
+        return {
+            team: {"size": size, "dedicated": dedicated, "available": available}
+            for team, size, dedicated, available in zip(
+                self.team_ids, self.team_sizes.tolist(), self.team_dedicated.tolist(),
+                self.team_available.tolist()
+            )
+        }
+
+    def _step_index(self, step):
+        """把动作中的工序引用转换为工序下标（接受下标或字符串工序ID），不存在时返回None"""
+        if isinstance(step, str):
+            return self.step_position.get(step)
+        if 0 <= step < len(self.work_steps):
+            return int(step)
         return None
 
     def _get_workpoint_steps(self, workpoint_id):
-        """获取指定工作点的所有工序"""
-        return [step for step in self.work_steps if step["workpoint_id"] == workpoint_id]
+        """获取指定工作点的所有工序（返回索引中的列表，调用方不应修改）"""
+        return self.workpoint_step_index.get(workpoint_id, [])
 
     def reset(self):
         """重置环境到初始状态"""
-        for team in self.teams:
-            self.teams[team]["available"] = self.teams[team]["size"]
-            self.team_allocations[team] = {}
+        self.team_available[:] = self.team_sizes
+        self.team_allocations = [{} for _ in self.team_ids]
+        self.team_profiles = [TeamResourceProfile(size) for size in self.team_sizes.tolist()]
 
-        self.step_status = {step["id"]: 0 for step in self.work_steps}
-        self.step_allocations = {step["id"]: 0 for step in self.work_steps}
-        self.step_max_allocations = {step["id"]: 0 for step in self.work_steps}
-        self.step_start_times = {step["id"]: 0 for step in self.work_steps}
-        self.step_end_times = {step["id"]: 0 for step in self.work_steps}
+        # 原地清零，保持字典视图和状态缓冲区引用的数组不变
+        self._status.fill(0)
+        self._allocations.fill(0)
+        self._max_allocations.fill(0)
+        self._start_times.fill(0)
+        self._end_times.fill(0)
 
         self.current_time = 0
         self.events = []
+        self._event_seq = 0
+        self._reset_precedence_state()
+        self._reset_progress_counters()
+        self.clear_undo_log()
+        self._action_cache = {}
 
         return self._get_state()
 
-    def _get_state(self):
-        """将多工作点环境状态转换为神经网络输入向量"""
-        state = []
+    def _build_state_buffer(self):
+        """
+        预分配状态向量并写入静态特征
 
-        # 每个工序的状态信息 (4个值/工序)
-        for step in self.work_steps:
-            step_id = step["id"]
-            state.append(self.step_status[step_id])         # 工序状态
-            state.append(self.step_allocations[step_id])    # 当前分配人数
-            state.append(1.0 if step["dedicated"] else 0.0) # 是否专用团队
-            state.append(step["order"])                     # 工序顺序号
+        布局: 每个工序4个值(状态, 当前分配人数, 是否专用团队, 工序顺序号)，
+        随后为团队可用率、每个工作点的完成度和活跃度、标准化时间。
+        """
+        num_steps = len(self.work_steps)
+        num_teams = len(self.team_ids)
+        num_workpoints = len(self.workpoint_ids)
+
+        self._state_buffer = np.zeros(4 * num_steps + num_teams + 2 * num_workpoints + 1, dtype=np.float32)
+        step_features = self._state_buffer[:4 * num_steps].reshape(num_steps, 4)
+        step_features[:, 2] = self.step_table.dedicated
+        step_features[:, 3] = self.step_table.order
+        self._bind_state_views()
+
+        # 无工序的工作点除数取1，其计数恒为0，结果即为0
+        self._workpoint_divisor = np.maximum(self.workpoint_sizes, 1).astype(np.float64)
+
+    def _bind_state_views(self):
+        """在状态缓冲区上建立各段特征的切片视图"""
+        num_steps = len(self.work_steps)
+        num_teams = len(self.team_ids)
+        num_workpoints = len(self.workpoint_ids)
+
+        step_features = self._state_buffer[:4 * num_steps].reshape(num_steps, 4)
+        self._state_status = step_features[:, 0]
+        self._state_allocations = step_features[:, 1]
+        self._state_teams = self._state_buffer[4 * num_steps:4 * num_steps + num_teams]
+        workpoint_features = self._state_buffer[4 * num_steps + num_teams:-1].reshape(num_workpoints, 2)
+        self._state_progress = workpoint_features[:, 0]
+        self._state_activity = workpoint_features[:, 1]
+
+    def _get_state(self, copy=True):
+        """
+        将多工作点环境状态写入状态缓冲区
+
+        Args:
+            copy: 是否返回缓冲区副本。copy=False返回缓冲区本身（零拷贝），
+                其内容会在下一次调用时被覆盖
+        """
+        self._state_status[:] = self._status
+        self._state_allocations[:] = self._allocations
 
         # 团队可用性 (标准化百分比)
-        for team in self.teams:
-            state.append(self.teams[team]["available"] / self.teams[team]["size"])
+        self._state_teams[:] = self.team_available / self.team_sizes
 
-        # 工作点完成度统计 (2个值/工作点)
-        for workpoint_id in self.workpoint_ids:
-            workpoint_steps = self._get_workpoint_steps(workpoint_id)
-            if workpoint_steps:
-                # 工作点完成进度
-                completed_steps = sum(1 for step in workpoint_steps if self.step_status[step["id"]] == 2)
-                progress = completed_steps / len(workpoint_steps)
-                state.append(progress)
-                
-                # 工作点活跃度 (正在进行的工序数量)
-                active_steps = sum(1 for step in workpoint_steps if self.step_status[step["id"]] == 1)
-                activity = active_steps / len(workpoint_steps)
-                state.append(activity)
-            else:
-                state.extend([0.0, 0.0])  # 无工序的工作点
+        # 工作点完成进度和活跃度 (正在进行的工序数量占比)
+        self._state_progress[:] = self.workpoint_completed / self._workpoint_divisor
+        self._state_activity[:] = self.workpoint_active / self._workpoint_divisor
 
         # 当前时间 (标准化)
-        state.append(min(1.0, self.current_time / 1000))
+        self._state_buffer[-1] = min(1.0, self.current_time / 1000)
+
+        return self._state_buffer.copy() if copy else self._state_buffer
 
-        return np.array(state, dtype=np.float32)
+    def snapshot(self):
+        """
+        保存当前调度状态的快照
 
-    def get_team_used_workers(self, team_name, check_time=None):
-        """获取团队在指定时间点使用的工人数量"""
+        只复制可变状态（工序状态数组、事件队列、团队可用人数及分配记录、资源曲线、
+        前序约束计数和进度计数），工序定义等静态数据不复制。
+
+        Returns:
+            dict: 可传给restore()的快照，可重复恢复多次
+        """
+        return {
+            "status": self._status.copy(),
+            "allocations": self._allocations.copy(),
+            "max_allocations": self._max_allocations.copy(),
+            "start_times": self._start_times.copy(),
+            "end_times": self._end_times.copy(),
+            "current_time": self.current_time,
+            "events": self.events[:],
+            "event_seq": self._event_seq,
+            "available": self.team_available.copy(),
+            "team_allocations": [dict(allocs) for allocs in self.team_allocations],
+            "team_profiles": [profile.copy() for profile in self.team_profiles],
+            "ready_steps": set(self.ready_steps),
+            "stage_remaining": [remaining[:] for remaining in self.stage_remaining],
+            "released_stage": self.released_stage[:],
+            "workpoint_completed": self.workpoint_completed.copy(),
+            "workpoint_active": self.workpoint_active.copy(),
+            "num_completed": self.num_completed,
+            "num_active": self.num_active,
+        }
+
+    def restore(self, snapshot):
+        """
+        恢复到snapshot()保存的状态
+
+        数组原地覆盖，字典视图和状态缓冲区保持有效；快照本身不会被修改。
+        """
+        np.copyto(self._status, snapshot["status"])
+        np.copyto(self._allocations, snapshot["allocations"])
+        np.copyto(self._max_allocations, snapshot["max_allocations"])
+        np.copyto(self._start_times, snapshot["start_times"])
+        np.copyto(self._end_times, snapshot["end_times"])
+        self.current_time = snapshot["current_time"]
+        self.events = snapshot["events"][:]
+        self._event_seq = snapshot["event_seq"]
+        np.copyto(self.team_available, snapshot["available"])
+        self.team_allocations = [dict(allocs) for allocs in snapshot["team_allocations"]]
+        self.team_profiles = [profile.copy() for profile in snapshot["team_profiles"]]
+        self.ready_steps = set(snapshot["ready_steps"])
+        self.stage_remaining = [remaining[:] for remaining in snapshot["stage_remaining"]]
+        self.released_stage = snapshot["released_stage"][:]
+        np.copyto(self.workpoint_completed, snapshot["workpoint_completed"])
+        np.copyto(self.workpoint_active, snapshot["workpoint_active"])
+        self.num_completed = snapshot["num_completed"]
+        self.num_active = snapshot["num_active"]
+        self.clear_undo_log()
+        self._action_cache = {}
+
+    def clone(self):
+        """
+        复制出一个独立的环境分支
+
+        工序定义、索引和前序DAG等静态数据与原环境共享，可变状态独立。
+        """
+        env = copy.copy(self)
+        env.team_available = np.empty_like(self.team_available)
+        env._status = np.empty_like(self._status)
+        env._allocations = np.empty_like(self._allocations)
+        env._max_allocations = np.empty_like(self._max_allocations)
+        env._start_times = np.empty_like(self._start_times)
+        env._end_times = np.empty_like(self._end_times)
+        env.step_status = StepArrayView(env._status, env.step_position)
+        env.step_allocations = StepArrayView(env._allocations, env.step_position)
+        env.step_max_allocations = StepArrayView(env._max_allocations, env.step_position)
+        env.step_start_times = StepArrayView(env._start_times, env.step_position)
+        env.step_end_times = StepArrayView(env._end_times, env.step_position)
+        env.workpoint_completed = np.empty_like(self.workpoint_completed)
+        env.workpoint_active = np.empty_like(self.workpoint_active)
+        env._state_buffer = self._state_buffer.copy()
+        env._bind_state_views()
+        env._action_cache_stats = {"calls": 0, "hits": 0, "misses": 0}
+        env.restore(self.snapshot())
+        return env
+
+    def apply(self, action):
+        """
+        执行动作并记录撤销信息，与undo()配对使用
+
+        只记录该动作实际修改的字段（工序状态、分配人数、起止时间、事件、团队可用人数
+        及分配记录），撤销代价与动作影响的范围成正比，无需复制整个环境。
+        撤销日志只在所有动作都经由apply()执行时才有效。
+
+        Returns:
+            与step()相同的 (next_state, reward, done)
+        """
+        self._undo_frame = []
+        try:
+            result = self.step(action)
+        finally:
+            self._undo_stack.append(self._undo_frame)
+            self._undo_frame = None
+        return result
+
+    def undo(self):
+        """
+        撤销最近一次apply()执行的动作
+
+        Returns:
+            撤销后的状态向量
+        """
+        if not self._undo_stack:
+            raise RuntimeError("没有可撤销的动作")
+
+        for entry in reversed(self._undo_stack.pop()):
+            kind = entry[0]
+            if kind == "time":
+                self._invalidate_time_actions(self.current_time, entry[1])
+                self.current_time = entry[1]
+            elif kind == "pop":
+                heapq.heappush(self.events, entry[1])
+            elif kind == "start":
+                self._undo_start(*entry[1:])
+            else:
+                self._undo_complete(*entry[1:])
+
+        return self._get_state()
+
+    def clear_undo_log(self):
+        """清空撤销日志"""
+        self._undo_stack = []
+        self._undo_frame = None
+
+    def _undo_start(self, i, was_ready, available, event_seq, allocation, max_allocation, start_time, end_time,
+                    previous_frontier, released):
+        """撤销_start_step"""
+        t = self.step_team[i]
+        self._invalidate_team_actions(t)
+
+        # 移除该工序的完成事件
+        self.events = [event for event in self.events if event[1] != event_seq]
+        heapq.heapify(self.events)
+        self._event_seq = event_seq
+
+        if self._uses_profile(i):
+            workers = self.team_allocations[t].pop(i)
+            self.team_profiles[t].remove(self._start_times[i].item(), self._end_times[i].item(), workers)
+        self.team_available[t] = available
+
+        if previous_frontier is not None:
+            self._unrelease_stages(i, previous_frontier, released)
+        self._status[i] = 0
+        if was_ready:
+            self.ready_steps.add(i)
+        self.workpoint_active[self.step_workpoint[i]] -= 1
+        self.num_active -= 1
+
+        self._allocations[i] = allocation
+        self._max_allocations[i] = max_allocation
+        self._start_times[i] = start_time
+        self._end_times[i] = end_time
+
+    def _undo_complete(self, i, available, allocation, previous_frontier, released):
+        """撤销_complete_step"""
+        t = self.step_team[i]
+        k = self.step_workpoint[i]
+        self._invalidate_team_actions(t)
+        for j in released:
+            self._invalidate_workpoint_actions(self.step_team[j], k)
+
+        if previous_frontier is not None:
+            self._unrelease_stages(i, previous_frontier, released)
+
+        self._status[i] = 1
+        self.workpoint_active[k] += 1
+        self.workpoint_completed[k] -= 1
+        self.num_active += 1
+        self.num_completed -= 1
+
+        self.team_available[t] = available
+        if self._uses_profile(i):
+            self.team_allocations[t][i] = allocation
+            self.team_profiles[t].add(self._start_times[i].item(), self._end_times[i].item(), allocation)
+        self._allocations[i] = allocation
+
+    def get_team_used_workers(self, t, check_time=None):
+        """获取团队下标t在指定时间点使用的工人数量"""
         if check_time is None:
             check_time = self.current_time
-            
-        used_workers = 0
-        if team_name in self.team_allocations:
-            for step_id, workers in self.team_allocations[team_name].items():
-                if self.step_status[step_id] == 1:  # 正在进行的工序
-                    # 检查工序是否在指定时间点正在执行
-                    start_time = self.step_start_times.get(step_id, 0)
-                    end_time = self.step_end_times.get(step_id, float('inf'))
-                    if start_time <= check_time < end_time:  # 修改为 < 而不是 <=，避免边界重复计数
-                        used_workers += workers
-        return used_workers
+        return self.team_profiles[t].usage_at(check_time)
     
-    def get_max_concurrent_workers_in_period(self, team_name, start_time, end_time, exclude_steps=None):
+    def get_max_concurrent_workers_in_period(self, t, start_time, end_time, exclude_steps=None):
         """
         获取团队在指定时间段内的最大并发工作人数
         
         Args:
-            team_name: 团队名称
+            t: 团队下标
             start_time: 时间段开始
             end_time: 时间段结束
-            exclude_steps: 要排除的工序ID列表（用于检查新工序时排除自己）
+            exclude_steps: 要排除的工序下标列表（用于检查新工序时排除自己）
         
         Returns:
             该时间段内的最大并发人数
         """
-        if exclude_steps is None:
-            exclude_steps = set()
-        else:
-            exclude_steps = set(exclude_steps)
-        
-        # 收集所有相关的时间点
-        time_points = set([start_time, end_time])
-        
-        if team_name in self.team_allocations:
-            for step_id, workers in self.team_allocations[team_name].items():
-                if step_id in exclude_steps:
-                    continue
-                    
-                if self.step_status[step_id] == 1:  # 正在进行的工序
-                    step_start = self.step_start_times.get(step_id, 0)
-                    step_end = self.step_end_times.get(step_id, float('inf'))
-                    
-                    # 只添加与检查时间段有重叠的工序时间点
-                    if not (step_end <= start_time or step_start >= end_time):
-                        time_points.add(step_start)
-                        time_points.add(step_end)
-        
-        # 排序时间点
-        time_points = sorted(list(time_points))
-        
-        # 检查每个时间段的并发人数
-        max_concurrent = 0
-        for i in range(len(time_points) - 1):
-            # 在时间段的中点检查并发人数
-            check_time = (time_points[i] + time_points[i + 1]) / 2
-            
-            # 只检查在指定范围内的时间点
-            if start_time <= check_time < end_time:
-                concurrent = 0
-                
-                if team_name in self.team_allocations:
-                    for step_id, workers in self.team_allocations[team_name].items():
-                        if step_id in exclude_steps:
-                            continue
-                            
-                        if self.step_status[step_id] == 1:
-                            step_start = self.step_start_times.get(step_id, 0)
-                            step_end = self.step_end_times.get(step_id, float('inf'))
-                            
-                            if step_start <= check_time < step_end:
-                                concurrent += workers
-                
-                max_concurrent = max(max_concurrent, concurrent)
-        
-        return max_concurrent
+        profile = self.team_profiles[t]
+
+        # 需要排除的进行中工序：临时从资源曲线中移除，查询后恢复
+        excluded = []
+        if exclude_steps:
+            allocations = self.team_allocations[t]
+            for i in set(exclude_steps):
+                if i in allocations:
+                    excluded.append((self._start_times[i].item(), self._end_times[i].item(), allocations[i]))
+        if not excluded:
+            return profile.max_usage(start_time, end_time)
+
+        for step_start, step_end, workers in excluded:
+            profile.remove(step_start, step_end, workers)
+        try:
+            return profile.max_usage(start_time, end_time)
+        finally:
+            for step_start, step_end, workers in excluded:
+                profile.add(step_start, step_end, workers)
+
+    def get_earliest_start_time(self, t, workers, duration, not_before=None):
+        """
+        获取共用团队最早能连续duration时间提供workers人的开始时间
+
+        Args:
+            t: 团队下标
+            workers: 需要的人数
+            duration: 持续时间
+            not_before: 最早允许开始的时间（默认当前时间）
+        """
+        if not_before is None:
+            not_before = self.current_time
+        return self.team_profiles[t].earliest_fit(workers, duration, not_before)
     
-    def get_team_concurrent_workers(self, team_name, current_time):
-        """获取指定团队在指定时间点的并发工作人数"""
-        if team_name not in self.team_allocations:
-            return 0
-            
+    def get_team_concurrent_workers(self, t, current_time):
+        """获取团队下标t在指定时间点的并发工作人数"""
         concurrent_workers = 0
         
         # 检查所有正在进行的工序
-        for step_id, workers in self.team_allocations[team_name].items():
-            step = self._get_step_by_id(step_id)
-            if step and self.step_status[step_id] == 1:  # 正在进行中
-                start_time = self.step_start_times[step_id]
-                end_time = self.step_end_times[step_id]
-                
+        for i, workers in self.team_allocations[t].items():
+            if self._status[i] == 1:  # 正在进行中
                 # 检查时间是否重叠
-                if start_time <= current_time <= end_time:
+                if self._start_times[i] <= current_time <= self._end_times[i]:
                     concurrent_workers += workers
                     
         return concurrent_workers
     
-    def check_team_capacity_constraint(self, team_name, new_workers, start_time, end_time, exclude_steps=None):
+    def check_team_capacity_constraint(self, t, new_workers, start_time, end_time, exclude_steps=None):
         """
         检查团队容量约束（改进版）
         
         Args:
-            team_name: 团队名称
+            t: 团队下标
             new_workers: 新工序需要的人数
             start_time: 新工序开始时间
             end_time: 新工序结束时间
-            exclude_steps: 要排除的工序ID列表（用于批量检查时排除其他批量工序）
+            exclude_steps: 要排除的工序下标列表（用于批量检查时排除其他批量工序）
         
         Returns:
             True表示满足约束，False表示违反约束
         """
-        team_size = self.teams[team_name]["size"]
-        team_info = self.teams[team_name]
+        team_size = self.team_sizes[t]
         
         # 对于专用团队，检查是否完全可用
-        if team_info["dedicated"]:
-            if team_info["available"] != team_size:
+        if self.team_dedicated[t]:
+            if self.team_available[t] != team_size:
                 return False  # 专用团队必须完全可用才能开始新任务
             return True
         
         # 对于共用团队，使用新的方法检查整个时间段内的最大并发人数
         max_concurrent = self.get_max_concurrent_workers_in_period(
-            team_name, start_time, end_time, exclude_steps
+            t, start_time, end_time, exclude_steps
         )
         
         # 检查加上新工序后是否超过团队容量
@@ -284,114 +751,103 @@ class FactoryEnvironment:
         return True
 
     def get_available_steps(self):
-        """获取当前可以开始的工序"""
-        available_steps = []
+        """获取当前可以开始的工序下标（只检查前序约束已满足的就绪工序）"""
+        return [i for i in sorted(self.ready_steps) if self._is_step_available(i)]
 
-        for step in self.work_steps:
-            step_id = step["id"]
-            
-            if self.step_status[step_id] != 0:
-                continue  # 已经在进行或已完成
+    def _is_step_available(self, i):
+        """就绪工序i当前是否可以开始（并行兄弟工序和团队人员检查）"""
+        step = self.work_steps[i]
 
-            # 检查同一工作点内的前序约束
-            can_start = True
-            current_order = step["order"]
-            workpoint_id = step["workpoint_id"]
+        # 专用团队的并行工序：同团队的并行兄弟工序正在进行时不能开始
+        if any(self._status[sibling] == 1 for sibling in self.parallel_siblings.get(i, ())):
+            return False
 
-            # 获取同一工作点的所有工序
-            workpoint_steps = self._get_workpoint_steps(workpoint_id)
-            
-            for other_step in workpoint_steps:
-                other_step_id = other_step["id"]
-                
-                # 如果有更低顺序号的工序未完成，不能开始
-                if other_step["order"] < current_order and self.step_status[other_step_id] != 2:
-                    can_start = False
-                    break
-
-                # 对于并行步骤（顺序4），需要检查是否来自同一专用团队
-                if (step.get("parallel") and other_step.get("parallel") and 
-                    step["team"] == other_step["team"]):
-                    if step["dedicated"] and self.step_status[other_step_id] == 1:
-                        # 如果同一专用团队的另一个步骤正在进行，不能开始
-                        can_start = False
-                        break
-
-            if can_start:
-                # 检查团队是否有可用人员
-                team_name = step["team"]
-                team = self.teams[team_name]
-
-                # 对于专用团队，检查是否完全可用
-                if step["dedicated"]:
-                    if team["available"] == team["size"]:  # 专用团队必须全部可用
-                        available_steps.append(step_id)
-                else:
-                    # 对于共用团队，检查是否有足够的可用人员
-                    used_workers = self.get_team_used_workers(team_name)
-                    min_required = max(
-                        ALLOCATION_CONFIG["min_worker_absolute"], 
-                        int(team["size"] * ALLOCATION_CONFIG["min_worker_ratio"])
-                    )
-                    if used_workers + min_required <= team["size"]:
-                        available_steps.append(step_id)
+        # 检查团队是否有可用人员
+        t = self.step_team[i]
+        team_size = self.team_sizes[t]
+
+        # 对于专用团队，检查是否完全可用
+        if step.dedicated:
+            return self.team_available[t] == team_size  # 专用团队必须全部可用
 
-        return available_steps
+        # 对于共用团队，检查是否有足够的可用人员
+        used_workers = self.get_team_used_workers(t)
+        min_required = max(
+            ALLOCATION_CONFIG["min_worker_absolute"], 
+            int(team_size * ALLOCATION_CONFIG["min_worker_ratio"])
+        )
+        return used_workers + min_required <= team_size
 
-    def get_parallel_step_groups(self):
+    def get_parallel_step_groups(self, available_steps=None):
         """
         识别可以同时并行执行的工序组（按工作点、团队和order分组）
         只针对共用团队的并行工序
         
+        Args:
+            available_steps: 候选工序下标列表（默认为当前所有可开始的工序）
+        
         Returns:
-            字典格式: {(workpoint_id, team_name, order): [step_ids]}
+            字典格式: {(工作点下标, 团队下标, order): [工序下标]}
         """
-        available_steps = self.get_available_steps()
+        if available_steps is None:
+            available_steps = self.get_available_steps()
         parallel_groups = {}
         
-        for step_id in available_steps:
-            step = self._get_step_by_id(step_id)
+        for i in available_steps:
+            step = self.work_steps[i]
             
             # 只处理共用团队的并行工序
-            if step["dedicated"]:
+            if step.dedicated:
                 continue
                 
             # 检查是否标记为可并行
-            if not step.get("parallel", False):
+            if not step.parallel:
                 continue
             
             # 按工作点、团队和order分组
-            group_key = (step["workpoint_id"], step["team"], step["order"])
+            group_key = (self.step_workpoint[i].item(), self.step_team[i].item(), step.order)
             
             if group_key not in parallel_groups:
                 parallel_groups[group_key] = []
             
-            parallel_groups[group_key].append(step_id)
+            parallel_groups[group_key].append(i)
         
         # 过滤掉只有单个工序的组（单个工序不需要批量启动）
         parallel_groups = {k: v for k, v in parallel_groups.items() if len(v) > 1}
         
         return parallel_groups
     
-    def generate_batch_allocation(self, step_ids, team_name, team_size):
+    def generate_batch_allocation(self, step_ids, t, team_size):
         """
         为一组并行工序生成均匀分配方案
         
         Args:
-            step_ids: 工序ID列表
-            team_name: 团队名称
+            step_ids: 工序下标列表
+            t: 团队下标
             team_size: 团队总人数
             
         Returns:
-            分配方案列表: [[(step_id1, workers1), (step_id2, workers2), ...], ...]
+            分配方案列表: [[(工序下标1, workers1), (工序下标2, workers2), ...], ...]
         """
-        num_steps = len(step_ids)
-        if num_steps == 0:
+        if len(step_ids) == 0:
             return []
         
         # 获取当前时间点团队已使用的人数
-        current_used = self.get_team_used_workers(team_name, self.current_time)
+        current_used = self.get_team_used_workers(t, self.current_time)
         available_workers = team_size - current_used
+        return self.batch_allocation_schemes(step_ids, available_workers, team_size)
+
+    @staticmethod
+    def batch_allocation_schemes(step_ids, available_workers, team_size):
+        """
+        按可用人数为一组并行工序生成分配方案（均匀 / 优先 / 最小人数，去掉重复方案）
+
+        方案只取决于工序组、可用人数和团队规模，动作目录据此枚举全部可能的批量动作。
+
+        Returns:
+            分配方案列表: [[(工序下标1, workers1), (工序下标2, workers2), ...], ...]
+        """
+        num_steps = len(step_ids)
         
         # 最小分配人数
         min_workers = max(
@@ -455,7 +911,7 @@ class FactoryEnvironment:
         验证批量分配方案是否满足所有约束
         
         Args:
-            batch_allocation: [(step_id, workers), ...]
+            batch_allocation: [(工序下标, workers), ...]，也接受字符串工序ID
             
         Returns:
             (is_valid, reason): (是否有效, 失败原因)
@@ -465,54 +921,51 @@ class FactoryEnvironment:
         
         # 按团队分组检查
         team_allocations = {}
-        for step_id, workers in batch_allocation:
-            step = self._get_step_by_id(step_id)
-            if step is None:
-                return False, f"工序{step_id}不存在"
+        for step_ref, workers in batch_allocation:
+            i = self._step_index(step_ref)
+            if i is None:
+                return False, f"工序{step_ref}不存在"
             
-            team_name = step["team"]
-            if team_name not in team_allocations:
-                team_allocations[team_name] = []
-            team_allocations[team_name].append((step_id, workers, step))
+            t = self.step_team[i].item()
+            if t not in team_allocations:
+                team_allocations[t] = []
+            team_allocations[t].append((i, workers))
         
         # 检查每个团队的约束
-        for team_name, allocations in team_allocations.items():
-            team_size = self.teams[team_name]["size"]
+        for t, allocations in team_allocations.items():
+            team_size = self.team_sizes[t]
             
             # 计算总分配人数
-            total_workers = sum(workers for _, workers, _ in allocations)
+            total_workers = sum(workers for _, workers in allocations)
             
             # 检查是否超过团队容量
-            current_used = self.get_team_used_workers(team_name, self.current_time)
+            current_used = self.get_team_used_workers(t, self.current_time)
             if current_used + total_workers > team_size:
-                return False, f"团队{team_name}容量不足: 当前使用{current_used}, 需要{total_workers}, 总容量{team_size}"
+                return False, (f"团队{self.team_ids[t]}容量不足: 当前使用{current_used}, "
+                               f"需要{total_workers}, 总容量{team_size}")
             
             # 检查时间约束（计算每个工序的预计完成时间，确保不会超员）
             step_times = []
-            for step_id, workers, step in allocations:
-                base_duration = step["duration"]
-                team_step_size = step["team_size"]
-                
-                efficiency = 0.6 + 0.4 * (workers / team_step_size)
-                collaboration_bonus = 1.0 - 0.2 * (workers / team_step_size) ** 0.5
-                adjusted_duration = base_duration * (team_step_size / workers) * efficiency * collaboration_bonus
+            for i, workers in allocations:
+                adjusted_duration = self.get_adjusted_duration(i, workers)
                 
                 start_time = self.current_time
                 end_time = start_time + adjusted_duration
-                step_times.append((step_id, workers, start_time, end_time))
+                step_times.append((i, workers, start_time, end_time))
             
             # 检查批量启动时是否所有工序都能满足容量约束
             # 需要排除批量中的其他工序，只检查与已有工序的冲突
-            exclude_step_ids = [step_id for step_id, _, _ in allocations]
+            exclude_step_ids = [i for i, _ in allocations]
             
-            for step_id, workers, start_time, end_time in step_times:
+            for i, workers, start_time, end_time in step_times:
                 # 排除当前检查的工序和同批次的其他工序
-                exclude_for_this = [sid for sid in exclude_step_ids if sid != step_id]
+                exclude_for_this = [j for j in exclude_step_ids if j != i]
                 
                 if not self.check_team_capacity_constraint(
-                    team_name, workers, start_time, end_time, exclude_steps=exclude_for_this
+                    t, workers, start_time, end_time, exclude_steps=exclude_for_this
                 ):
-                    return False, f"工序{step_id}时间段[{start_time:.2f}, {end_time:.2f}]违反容量约束"
+                    return False, (f"工序{self.work_steps[i]['id']}时间段[{start_time:.2f}, {end_time:.2f}]"
+                                   f"违反容量约束")
         
         return True, "验证通过"
 
@@ -520,146 +973,291 @@ class FactoryEnvironment:
         """
         获取当前状态下的所有有效动作（支持批量启动）
         
+        候选动作按(团队, 工作点)缓存，动作执行后只重算受影响的团队和工作点，
+        结果与逐次全量计算完全相同（含顺序）。
+        
         Returns:
-            valid_actions: 动作列表，包含以下类型：
-                - 单个工序启动: (step_id, workers)
-                - 批量工序启动: ("batch_start", [(step_id1, w1), (step_id2, w2), ...])
+            valid_actions: 动作列表（工序均以工序下标表示），包含以下类型：
+                - 单个工序启动: (i, workers)
+                - 批量工序启动: ("batch_start", ((i1, w1), (i2, w2), ...))
                 - 推进时间: ("advance_time", 0)
+                - 按最早开始时间启动: ("start_at", (i, workers, start_time))，
+                  仅在active/non_delay调度生成方式下出现，此时不含其他类型的动作
+        """
+        if self.schedule_mode != "timeline":
+            return self._get_schedule_actions()
+
+        if not self.cache_valid_actions:
+            self._action_cache = {}
+        stats = self._action_cache_stats
+        stats["calls"] += 1
+        misses_before = stats["misses"]
+        num_entries = 0
+
+        # 缓存缺失的团队：一次遍历就绪工序，按团队和工作点分组后重建
+        missing_teams = [t for t in range(len(self.team_ids)) if t not in self._action_cache]
+        if missing_teams:
+            ready_by_team = {t: {} for t in missing_teams}
+            for i in sorted(self.ready_steps):
+                team_ready = ready_by_team.get(self.step_team[i].item())
+                if team_ready is not None:
+                    team_ready.setdefault(self.step_workpoint[i].item(), []).append(i)
+            for t, team_ready in ready_by_team.items():
+                self._action_cache[t] = {
+                    "workpoints": {
+                        k: self._build_workpoint_actions(t, ready) for k, ready in team_ready.items()
+                    },
+                    "dirty": set(),
+                }
+
+        # 批量动作以组内第一个工序下标排序，单个动作以工序下标排序，与全量计算的顺序一致
+        batch_actions = []
+        single_actions = []
+        for t in range(len(self.team_ids)):
+            team_cache = self._action_cache[t]
+            workpoint_entries = team_cache["workpoints"]
+            if team_cache["dirty"]:
+                for k in team_cache["dirty"]:
+                    ready = sorted(
+                        j for stage in self.workpoint_stages[k] for j in stage
+                        if j in self.ready_steps and self.step_team[j] == t
+                    )
+                    if ready:
+                        workpoint_entries[k] = self._build_workpoint_actions(t, ready)
+                    else:
+                        workpoint_entries.pop(k, None)
+                team_cache["dirty"] = set()
+
+            # 共用团队的人数方案取决于该团队(所有工作点)待单独启动的工序是否多于一个
+            multiple = sum(len(entry["steps"]) for entry in workpoint_entries.values()) > 1
+            for entry in workpoint_entries.values():
+                num_entries += 1
+                batch_actions.extend(entry["batch"])
+                singles = entry["singles"].get(multiple)
+                if singles is None:
+                    singles = entry["singles"][multiple] = [
+                        (i, action) for i in entry["steps"] for action in self._single_step_actions(i, multiple)
+                    ]
+                single_actions.extend(singles)
+
+        stats["hits"] += num_entries - (stats["misses"] - misses_before)
+
+        batch_actions.sort(key=itemgetter(0))
+        single_actions.sort(key=itemgetter(0))
+        valid_actions = [action for _, action in batch_actions]
+        valid_actions.extend(action for _, action in single_actions)
+
+        # 如果有正在进行的工序，添加推进时间的动作
+        if self.events:
+            valid_actions.append(("advance_time", 0))
+
+        return valid_actions
+
+    def _build_workpoint_actions(self, t, ready):
         """
-        valid_actions = []
-        available_steps = self.get_available_steps()
+        计算一个团队在一个工作点上的候选动作缓存条目
 
-        # 1. 识别可以批量启动的并行工序组
-        parallel_groups = self.get_parallel_step_groups()
+        Args:
+            t: 团队下标
+            ready: 该团队在该工作点的就绪工序下标（升序）
+
+        Returns:
+            dict: batch为[(首个工序下标, 批量动作)]；steps为需单独启动的工序下标；
+                singles按"团队是否有多个待启动工序"分别缓存单个启动动作
+        """
+        self._action_cache_stats["misses"] += 1
+        available_steps = [i for i in ready if self._is_step_available(i)]
+
+        # 1. 并行工序组的批量启动方案
+        team_size = self.team_sizes[t].item()
+        batch = []
         batch_step_ids = set()  # 已经在批量方案中的工序
-        
-        # 为每个并行工序组生成批量启动方案
-        for (workpoint_id, team_name, order), step_ids in parallel_groups.items():
-            team = self.teams[team_name]
-            team_size = team["size"]
-            
-            # 生成均匀分配方案
-            allocation_schemes = self.generate_batch_allocation(step_ids, team_name, team_size)
-            
-            # 验证并添加有效的批量方案
-            for allocation in allocation_schemes:
+        for step_ids in self.get_parallel_step_groups(available_steps).values():
+            for allocation in self.generate_batch_allocation(step_ids, t, team_size):
                 is_valid, reason = self.validate_batch_allocation(allocation)
                 if is_valid:
-                    valid_actions.append(("batch_start", tuple(allocation)))
-                    # 记录这些工序ID，避免重复生成单个启动动作
-                    batch_step_ids.update([step_id for step_id, _ in allocation])
-        
-        # 2. 为非批量工序和专用团队工序生成单个启动动作
-        # 按团队分组可用工序，用于优化并行处理
-        team_steps = {}
-        for step_id in available_steps:
-            # 跳过已经在批量方案中的工序
-            if step_id in batch_step_ids:
-                continue
-                
-            step = self._get_step_by_id(step_id)
-            team_name = step["team"]
-            if team_name not in team_steps:
-                team_steps[team_name] = []
-            team_steps[team_name].append(step_id)
-
-        # 3. 为非批量工序生成单个启动动作
-        for step_id in available_steps:
-            # 跳过已经在批量方案中的工序
-            if step_id in batch_step_ids:
+                    batch.append((step_ids[0], ("batch_start", tuple(allocation))))
+                    # 记录这些工序下标，避免重复生成单个启动动作
+                    batch_step_ids.update(i for i, _ in allocation)
+
+        # 2. 非批量工序单独启动
+        steps = [i for i in available_steps if i not in batch_step_ids]
+        return {"batch": batch, "steps": steps, "singles": {}}
+
+    def _single_step_actions(self, i, multiple):
+        """
+        生成工序i的单个启动动作
+
+        Args:
+            i: 工序下标
+            multiple: 同团队是否有多个待单独启动的工序（决定人数方案）
+        """
+        step = self.work_steps[i]
+        t = self.step_team[i]
+        actions = []
+
+        # 预计算工序的开始时间
+        team_size = step.team_size
+        predicted_start_time = self.current_time
+
+        if step.dedicated:
+            # 专用团队总是使用全部人力
+            if self.team_available[t] == self.team_sizes[t]:
+                # 专用团队不需要检查时间冲突（因为他们独占团队）
+                actions.append((i, self.team_sizes[t].item()))
+            return actions
+
+        # 对于共用团队，需要检查时间冲突
+        used_workers = self.get_team_used_workers(t, self.current_time)
+        available_workers = self.team_sizes[t].item() - used_workers
+
+        # 生成可能的工人分配方案
+        possible_allocations = []
+        
+        # 设置最小分配人数，避免单人分配效率过低
+        min_workers = max(
+            ALLOCATION_CONFIG["min_worker_absolute"], 
+            int(team_size * ALLOCATION_CONFIG["min_worker_ratio"])
+        )
+        
+        if not multiple and available_workers > 0:
+            # 单个工序时，优先分配较多人员
+            if available_workers >= min_workers:
+                possible_allocations = [min(available_workers, team_size)]
+        elif multiple and available_workers > 0:
+            # 多个工序时，考虑均匀分配
+            max_allocation = min(available_workers, team_size)
+            
+            if max_allocation >= min_workers:
+                # 生成均匀分配方案，避免单人分配
+                possible_allocations = [
+                    max_allocation,
+                    max(min_workers, int(max_allocation * 0.75)),
+                    max(min_workers, int(max_allocation * 0.5)),
+                    max(min_workers, int(max_allocation * 0.33)),  # 适合3个并行工序
+                    min_workers
+                ]
+                # 移除重复值并排序
+                possible_allocations = sorted(list(set(possible_allocations)), reverse=True)
+
+        # 检查每个分配方案是否满足时间约束
+        for workers in possible_allocations:
+            if workers <= 0:
                 continue
                 
-            step = self._get_step_by_id(step_id)
-            team_name = step["team"]
-            team = self.teams[team_name]
-
-            # 预计算工序的开始和结束时间
-            base_duration = step["duration"]
-            team_size = step["team_size"]
-            predicted_start_time = self.current_time
-
-            if step["dedicated"]:
-                # 专用团队总是使用全部人力
-                if team["available"] == team["size"]:
-                    workers = team["size"]
-                    
-                    # 计算预期完成时间
-                    efficiency = 0.6 + 0.4 * (workers / team_size)
-                    collaboration_bonus = 1.0 - 0.2 * (workers / team_size) ** 0.5
-                    adjusted_duration = base_duration * (team_size / workers) * efficiency * collaboration_bonus
-                    predicted_end_time = predicted_start_time + adjusted_duration
-                    
-                    # 专用团队不需要检查时间冲突（因为他们独占团队）
-                    valid_actions.append((step_id, workers))
+            # 计算预期完成时间
+            predicted_end_time = predicted_start_time + self.get_adjusted_duration(i, workers)
+            
+            # 使用改进的容量约束检查
+            if self.check_team_capacity_constraint(t, workers,
+                                                 predicted_start_time, predicted_end_time):
+                actions.append((i, workers))
             else:
-                # 对于共用团队，需要检查时间冲突
-                used_workers = self.get_team_used_workers(team_name, self.current_time)
-                available_workers = team["size"] - used_workers
-                same_team_steps = team_steps.get(team_name, [])
+                # 如果当前分配方案不满足约束，后续更大的分配方案也不会满足
+                break
 
-                # 生成可能的工人分配方案
-                possible_allocations = []
-                
-                # 设置最小分配人数，避免单人分配效率过低
-                min_workers = max(
-                    ALLOCATION_CONFIG["min_worker_absolute"], 
-                    int(team_size * ALLOCATION_CONFIG["min_worker_ratio"])
-                )
-                
-                if len(same_team_steps) == 1 and available_workers > 0:
-                    # 单个工序时，优先分配较多人员
-                    if available_workers >= min_workers:
-                        possible_allocations = [min(available_workers, team_size)]
-                elif len(same_team_steps) > 1 and available_workers > 0:
-                    # 多个工序时，考虑均匀分配
-                    max_allocation = min(available_workers, team_size)
-                    
-                    if max_allocation >= min_workers:
-                        # 生成均匀分配方案，避免单人分配
-                        possible_allocations = [
-                            max_allocation,
-                            max(min_workers, int(max_allocation * 0.75)),
-                            max(min_workers, int(max_allocation * 0.5)),
-                            max(min_workers, int(max_allocation * 0.33)),  # 适合3个并行工序
-                            min_workers
-                        ]
-                        # 移除重复值并排序
-                        possible_allocations = sorted(list(set(possible_allocations)), reverse=True)
-
-                # 检查每个分配方案是否满足时间约束
-                for workers in possible_allocations:
-                    if workers <= 0:
-                        continue
-                        
-                    # 计算预期完成时间
-                    efficiency = 0.6 + 0.4 * (workers / team_size)
-                    collaboration_bonus = 1.0 - 0.2 * (workers / team_size) ** 0.5
-                    adjusted_duration = base_duration * (team_size / workers) * efficiency * collaboration_bonus
-                    predicted_end_time = predicted_start_time + adjusted_duration
-                    
-                    # 使用改进的容量约束检查
-                    if self.check_team_capacity_constraint(team_name, workers, 
-                                                         predicted_start_time, predicted_end_time):
-                        valid_actions.append((step_id, workers))
-                    else:
-                        # 如果当前分配方案不满足约束，后续更大的分配方案也不会满足
-                        break
+        return actions
 
-        # 4. 如果有正在进行的工序，添加推进时间的动作
-        if self.events:
-            valid_actions.append(("advance_time", 0))
+    def _get_schedule_actions(self):
+        """
+        按最早开始时间生成候选动作（active/non_delay调度生成方式）
 
-        return valid_actions
+        每个就绪工序的每种人数方案给出最早可行开始时间：不早于当前时间和前序工序结束时间，
+        且团队资源曲线在整个工期内有足够空闲人员。non_delay只保留开始时间最早的候选。
+        """
+        candidates = []
+        for i in sorted(self.ready_steps):
+            for workers in self._schedule_worker_options(i):
+                start_time = self.get_earliest_step_start(i, workers)
+                if start_time != float('inf'):
+                    candidates.append(("start_at", (i, workers, start_time)))
+
+        if self.schedule_mode == "non_delay" and candidates:
+            earliest = min(action[1][2] for action in candidates)
+            candidates = [action for action in candidates if action[1][2] == earliest]
+        return candidates
+
+    def _schedule_worker_options(self, i):
+        """按ALLOCATION_CONFIG的分配策略生成工序i的候选人数（专用团队固定为全部人员）"""
+        step = self.work_steps[i]
+        size = self.team_sizes[self.step_team[i]].item()
+        if step.dedicated:
+            return [size]
+
+        team_size = step.team_size
+        max_allocation = min(size, team_size)
+        min_workers = max(
+            ALLOCATION_CONFIG["min_worker_absolute"],
+            int(team_size * ALLOCATION_CONFIG["min_worker_ratio"])
+        )
+        options = set()
+        for strategy in ALLOCATION_CONFIG["allocation_strategies"]:
+            if strategy == "min":
+                options.add(min_workers)
+            else:
+                options.add(max(min_workers, int(max_allocation * strategy)))
+        return sorted((workers for workers in options if workers <= max_allocation), reverse=True)
+
+    def get_earliest_step_start(self, i, workers):
+        """
+        工序下标i分配workers人时的最早可行开始时间
+
+        不早于当前时间和前序工序的结束时间，并保证团队在整个工期内人员充足；
+        人数超过团队容量时返回inf。
+        """
+        not_before = max(self.current_time, self._release_time(i))
+        return self.get_earliest_start_time(self.step_team[i], workers, self.get_adjusted_duration(i, workers),
+                                            not_before)
+
+    def _invalidate_team_actions(self, t):
+        """团队t人员占用变化：丢弃该团队所有工作点的候选动作"""
+        self._action_cache.pop(int(t), None)
+
+    def _invalidate_workpoint_actions(self, t, k):
+        """工作点k中团队t的就绪工序变化：只重算该工作点的候选动作"""
+        team_cache = self._action_cache.get(int(t))
+        if team_cache is not None:
+            team_cache["dirty"].add(int(k))
+
+    def _invalidate_time_actions(self, old_time, new_time):
+        """
+        时间变化：只有当前时刻占用人数可能改变的共用团队需要重算
+
+        逐步推进时所有进行中工序都在当前时刻之前开始，此后占用人数单调不增，
+        区间最大占用即当前时刻的占用，因此只需检查两时刻之间是否有断点。
+        """
+        start, end = min(old_time, new_time), max(old_time, new_time)
+        for t, profile in enumerate(self.team_profiles):
+            if t in self._action_cache and profile.changes_between(start, end):
+                self._invalidate_team_actions(t)
+
+    def get_action_cache_stats(self):
+        """
+        候选动作缓存统计
+
+        Returns:
+            dict: calls为get_valid_actions调用次数，hits/misses为复用/重算的
+                (团队, 工作点)条目数，hit_rate为复用比例
+        """
+        stats = dict(self._action_cache_stats)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        return stats
+
+    def reset_action_cache_stats(self):
+        """清零候选动作缓存统计"""
+        self._action_cache_stats = {"calls": 0, "hits": 0, "misses": 0}
 
     def step(self, action):
         """
         在多工作点环境中执行动作（支持批量启动）
         
         Args:
-            action: 动作，可以是：
-                - (step_id, workers): 单个工序启动
-                - ("batch_start", [(step_id1, w1), (step_id2, w2), ...]): 批量启动
+            action: 动作，可以是（工序用工序下标表示，也接受字符串工序ID）：
+                - (i, workers): 单个工序启动
+                - ("batch_start", [(i1, w1), (i2, w2), ...]): 批量启动
                 - ("advance_time", 0): 推进时间
+                - ("start_at", (i, workers, start_time)): 按最早开始时间启动
         
         Returns:
             (next_state, reward, done): 下一状态，奖励，是否完成
@@ -673,57 +1271,64 @@ class FactoryEnvironment:
         if action_type == "batch_start":
             # 批量启动多个工序
             return self._step_batch(action_data)
-        
+
+        if action_type == "start_at":
+            # 按最早开始时间启动
+            step_ref, workers, _ = action_data
+            return self._step_at(step_ref, workers)
+
         # 单个工序启动（保持向后兼容）
-        step_id = action_type
+        step_ref = action_type
         workers = action_data
 
-        # 根据工序ID找到工序
-        step = self._get_step_by_id(step_id)
-        if step is None:
-            raise ValueError(f"工序ID {step_id} 不存在")
-            
-        team_name = step["team"]
-        team_size = step["team_size"]
+        if self.schedule_mode != "timeline":
+            # 按最早开始时间调度时，单个启动动作同样在最早可行时间开始
+            return self._step_at(step_ref, workers)
+
+        # 根据工序下标（或工序ID）找到工序
+        i = self._step_index(step_ref)
+        if i is None:
+            raise ValueError(f"工序ID {step_ref} 不存在")
+
+        step = self.work_steps[i]
+        t = self.step_team[i]
+        team_name = self.team_ids[t]
+        team_size = self.team_sizes[t].item()
 
         # 🔒 最终安全检查：验证团队容量约束
-        base_duration = step["duration"]
-        efficiency = 0.6 + 0.4 * (workers / team_size)
-        collaboration_bonus = 1.0 - 0.2 * (workers / team_size) ** 0.5
-        adjusted_duration = base_duration * (team_size / workers) * efficiency * collaboration_bonus
-        predicted_end_time = self.current_time + adjusted_duration
+        predicted_end_time = self.current_time + self.get_adjusted_duration(i, workers)
         
-        if step["dedicated"]:
+        if step.dedicated:
             # 专用团队检查：必须完全可用才能开始
-            if self.teams[team_name]["available"] != self.teams[team_name]["size"]:
+            if self.team_available[t] != team_size:
                 reward = -1000  # 严重惩罚
-                done = all(self.step_status[step["id"]] == 2 for step in self.work_steps)
+                done = self._all_steps_completed()
                 next_state = self._get_state()
-                print(f"⚠️  专用团队{team_name}不完全可用：可用{self.teams[team_name]['available']}人，需要{self.teams[team_name]['size']}人")
+                print(f"⚠️  专用团队{team_name}不完全可用：可用{self.team_available[t]}人，需要{team_size}人")
                 return next_state, reward, done
             # 专用团队使用全部人员
-            workers = self.teams[team_name]["size"]
+            workers = team_size
         else:
             # 共用团队检查：使用改进的容量约束检查
             # 检查整个执行时间段内是否会违反容量约束
-            if not self.check_team_capacity_constraint(team_name, workers, 
+            if not self.check_team_capacity_constraint(t, workers,
                                                      self.current_time, predicted_end_time):
                 # 尝试计算可用的最大人数
                 max_concurrent = self.get_max_concurrent_workers_in_period(
-                    team_name, self.current_time, predicted_end_time
+                    t, self.current_time, predicted_end_time
                 )
-                available_workers = self.teams[team_name]["size"] - max_concurrent
+                available_workers = team_size - max_concurrent
                 min_required = max(
                     ALLOCATION_CONFIG["min_worker_absolute"], 
-                    int(self.teams[team_name]["size"] * ALLOCATION_CONFIG["min_worker_ratio"])
+                    int(team_size * ALLOCATION_CONFIG["min_worker_ratio"])
                 )
                 
                 if available_workers < min_required:
                     # 没有足够可用人员，返回惩罚
                     reward = -1000  # 严重惩罚
-                    done = all(self.step_status[step["id"]] == 2 for step in self.work_steps)
+                    done = self._all_steps_completed()
                     next_state = self._get_state()
-                    print(f"⚠️  团队{team_name}容量约束违反：时间段[{self.current_time:.2f}, {predicted_end_time:.2f}]内最大已用{max_concurrent}人，尝试分配{workers}人，总容量{self.teams[team_name]['size']}人")
+                    print(f"⚠️  团队{team_name}容量约束违反：时间段[{self.current_time:.2f}, {predicted_end_time:.2f}]内最大已用{max_concurrent}人，尝试分配{workers}人，总容量{team_size}人")
                     return next_state, reward, done
                 else:
                     # 自动调整为可用人数
@@ -732,49 +1337,15 @@ class FactoryEnvironment:
                     print(f"🔧 自动调整团队{team_name}分配：从{old_workers}人调整为{workers}人")
                     
                     # 重新计算完成时间
-                    efficiency = 0.6 + 0.4 * (workers / team_size)
-                    collaboration_bonus = 1.0 - 0.2 * (workers / team_size) ** 0.5
-                    adjusted_duration = base_duration * (team_size / workers) * efficiency * collaboration_bonus
-                    predicted_end_time = self.current_time + adjusted_duration
-
-        # Record start time
-        self.step_start_times[step_id] = self.current_time
-
-        # Allocate workers
-        if step["dedicated"]:
-            # 专用团队
-            self.teams[team_name]["available"] = 0  # 将团队设为不可用
-        else:
-            # 共用团队 - 更新团队分配记录
-            if team_name not in self.team_allocations:
-                self.team_allocations[team_name] = {}
-            self.team_allocations[team_name][step_id] = workers
-
-        self.step_allocations[step_id] = workers
-        self.step_max_allocations[step_id] = workers  # 记录分配的工人数
-        self.step_status[step_id] = 1  # In progress
+                    predicted_end_time = self.current_time + self.get_adjusted_duration(i, workers)
 
         # Calculate completion time based on worker allocation
-        base_duration = step["duration"]
-        team_size = step["team_size"]
-
-        # 效率计算
-        efficiency = 0.6 + 0.4 * (workers / team_size)
-        collaboration_bonus = 1.0 - 0.2 * (workers / team_size) ** 0.5
-        adjusted_duration = base_duration * (team_size / workers) * efficiency * collaboration_bonus
-        completion_time = self.current_time + adjusted_duration
-
-        # Record expected end time
-        self.step_end_times[step_id] = completion_time
-
-        # Add to events
-        self.events.append((step_id, completion_time))
+        completion_time = self.current_time + self.get_adjusted_duration(i, workers)
 
-        # Sort events by completion time
-        self.events.sort(key=lambda x: x[1])
+        self._start_step(i, workers, completion_time)
 
         # Return state, reward, done
-        done = all(self.step_status[step["id"]] == 2 for step in self.work_steps)
+        done = self._all_steps_completed()
         next_state = self._get_state()
 
         # Reward is negative time delta to incentivize faster completion
@@ -787,7 +1358,7 @@ class FactoryEnvironment:
         批量启动多个工序
         
         Args:
-            batch_allocation: [(step_id1, workers1), (step_id2, workers2), ...]
+            batch_allocation: [(工序下标1, workers1), (工序下标2, workers2), ...]
             
         Returns:
             (next_state, reward, done): 下一状态，奖励，是否完成
@@ -806,53 +1377,21 @@ class FactoryEnvironment:
         total_reward = 0
         num_started = 0
         
-        for step_id, workers in batch_allocation:
-            step = self._get_step_by_id(step_id)
-            if step is None:
-                print(f"⚠️  工序ID {step_id} 不存在")
+        for step_ref, workers in batch_allocation:
+            i = self._step_index(step_ref)
+            if i is None:
+                print(f"⚠️  工序ID {step_ref} 不存在")
                 continue
             
-            team_name = step["team"]
-            
-            # 记录开始时间
-            self.step_start_times[step_id] = self.current_time
-            
-            # 分配工人
-            if step["dedicated"]:
-                # 专用团队（理论上不应该在批量启动中）
-                self.teams[team_name]["available"] = 0
-            else:
-                # 共用团队 - 更新团队分配记录
-                if team_name not in self.team_allocations:
-                    self.team_allocations[team_name] = {}
-                self.team_allocations[team_name][step_id] = workers
-            
-            self.step_allocations[step_id] = workers
-            self.step_max_allocations[step_id] = workers
-            self.step_status[step_id] = 1  # 进行中
-            
             # 计算完成时间
-            base_duration = step["duration"]
-            team_size = step["team_size"]
-            
-            efficiency = 0.6 + 0.4 * (workers / team_size)
-            collaboration_bonus = 1.0 - 0.2 * (workers / team_size) ** 0.5
-            adjusted_duration = base_duration * (team_size / workers) * efficiency * collaboration_bonus
-            completion_time = self.current_time + adjusted_duration
+            completion_time = self.current_time + self.get_adjusted_duration(i, workers)
             
-            # 记录预期结束时间
-            self.step_end_times[step_id] = completion_time
-            
-            # 添加到事件列表
-            self.events.append((step_id, completion_time))
+            self._start_step(i, workers, completion_time)
             
             num_started += 1
         
-        # 排序事件列表
-        self.events.sort(key=lambda x: x[1])
-        
         # 检查是否完成
-        done = all(self.step_status[step["id"]] == 2 for step in self.work_steps)
+        done = self._all_steps_completed()
         next_state = self._get_state()
         
         # 批量启动的奖励：鼓励批量启动（负值较小）
@@ -864,104 +1403,277 @@ class FactoryEnvironment:
             reward += (num_started - 1) * 0.5  # 每多启动一个工序，获得0.5的奖励
         
         # print(f"✅ 批量启动成功: {num_started}个工序同时启动")
-        # for step_id, workers in batch_allocation:
-        #     step = self._get_step_by_id(step_id)
+        # for i, workers in batch_allocation:
+        #     step = self.work_steps[i]
         #     print(f"   - {step['display_name']}: {workers}人")
         
         return next_state, reward, done
 
+    def _step_at(self, step_ref, workers):
+        """
+        在最早可行开始时间启动工序（active/non_delay调度生成方式）
+
+        时间直接跳到开始时间，途中完成的工序依次处理；最后一个工序排定后
+        处理剩余的完成事件，使episode立即结束。奖励为-1减去时间推进量。
+        """
+        i = self._step_index(step_ref)
+        if i is None:
+            raise ValueError(f"工序ID {step_ref} 不存在")
+
+        if i not in self.ready_steps:
+            print(f"⚠️  工序{self.work_steps[i]['id']}尚未就绪或已排定")
+            return self._get_state(), -1000, self._all_steps_completed()
+
+        start_time = self.get_earliest_step_start(i, workers)
+        if start_time == float('inf'):
+            print(f"⚠️  团队{self.team_ids[self.step_team[i]]}容量不足以分配{workers}人")
+            return self._get_state(), -1000, self._all_steps_completed()
+
+        previous_time = self.current_time
+        self._process_events_until(start_time)
+        self._set_time(start_time)
+        self._start_step(i, workers, start_time + self.get_adjusted_duration(i, workers))
+
+        # 所有工序均已排定：处理剩余完成事件
+        if self.num_completed + self.num_active == len(self.work_steps):
+            self._process_events_until(float('inf'))
+
+        done = self._all_steps_completed()
+        reward = -1 - (self.current_time - previous_time)
+        return self._get_state(), reward, done
+
+    def _process_events_until(self, end_time):
+        """按时间顺序处理所有不晚于end_time的完成事件"""
+        while self.events and self.events[0][0] <= end_time:
+            completion_time, _, i = self._pop_event()
+            self._set_time(completion_time)
+            self._complete_step(i)
+
     def _advance_time(self):
-        """推进时间到下一个事件并处理完成情况"""
+        """
+        推进时间到下一个事件并处理完成情况
+
+        若开启advance_all_simultaneous，同一时刻完成的所有工序在一次动作内处理完毕
+        """
         if not self.events:
             return self._get_state(), 0, False
 
         # 获取下一个事件
-        step_id, completion_time = self.events.pop(0)
+        completion_time, _, i = self._pop_event()
 
         # 推进时间
         time_delta = completion_time - self.current_time
-        self.current_time = completion_time
+        self._set_time(completion_time)
 
-        # 找到工序
-        step = self._get_step_by_id(step_id)
-        if step is None:
-            raise ValueError(f"工序ID {step_id} 不存在")
-            
-        team_name = step["team"]
-
-        # 完成工序
-        self.step_status[step_id] = 2  # 标记为已完成
+        self._complete_step(i)
 
-        # 释放工人
-        if step["dedicated"]:
-            # 专用团队
-            self.teams[team_name]["available"] = self.teams[team_name]["size"]
-        else:
-            # 共用团队 - 从团队分配记录中移除
-            if team_name in self.team_allocations and step_id in self.team_allocations[team_name]:
-                del self.team_allocations[team_name][step_id]
-
-        self.step_allocations[step_id] = 0  # 清零当前分配
+        if self.advance_all_simultaneous:
+            while self.events and self.events[0][0] == completion_time:
+                _, _, i = self._pop_event()
+                self._complete_step(i)
 
         # 检查是否所有工序都已完成
-        done = all(self.step_status[step["id"]] == 2 for step in self.work_steps)
+        done = self._all_steps_completed()
 
         # 奖励是负时间增量，以激励更快完成
         reward = -time_delta
 
         return self._get_state(), reward, done
 
+    def _start_step(self, i, workers, completion_time):
+        """在当前时间启动工序：分配工人、记录起止时间并加入完成事件"""
+        step = self.work_steps[i]
+        t = self.step_team[i]
+
+        if self._undo_frame is not None:
+            entry = [
+                "start", i, i in self.ready_steps, self.team_available[t].item(), self._event_seq,
+                self._allocations[i].item(), self._max_allocations[i].item(),
+                self._start_times[i].item(), self._end_times[i].item(), None, None,
+            ]
+            self._undo_frame.append(entry)
+
+        self._invalidate_team_actions(t)
+
+        # Record start time
+        self._start_times[i] = self.current_time
+
+        # Allocate workers
+        if step.dedicated:
+            # 专用团队
+            self.team_available[t] = 0  # 将团队设为不可用
+        if self._uses_profile(i):
+            # 共用团队（及按最早开始时间调度的专用团队） - 更新团队分配记录
+            self.team_allocations[t][i] = workers
+            self.team_profiles[t].add(self.current_time, completion_time, workers)
+
+        self._allocations[i] = workers
+        self._max_allocations[i] = workers  # 记录分配的工人数
+
+        # Record expected end time（先于_mark_step_started写入，供释放后继阶段计算释放时间）
+        self._end_times[i] = completion_time
+
+        previous_frontier, released = self._mark_step_started(i)  # In progress
+        if self._undo_frame is not None:
+            entry[9], entry[10] = previous_frontier, released
+        for j in released:
+            self._invalidate_workpoint_actions(self.step_team[j], self.step_workpoint[i])
+
+        # Add to events
+        self._push_event(i, completion_time)
+
+    def _complete_step(self, i):
+        """完成工序并释放其占用的工人"""
+        step = self.work_steps[i]
+        t = self.step_team[i]
+
+        if self._undo_frame is not None:
+            entry = ["complete", i, self.team_available[t].item(), self._allocations[i].item(), None, None]
+            self._undo_frame.append(entry)
+
+        # 完成工序（标记为已完成并释放后继阶段）
+        previous_frontier, released = self._mark_step_completed(i)
+        if self._undo_frame is not None:
+            entry[4], entry[5] = previous_frontier, released
+
+        # 团队人员变化影响该团队的全部候选动作，新释放的工序只影响所在工作点
+        self._invalidate_team_actions(t)
+        for j in released:
+            self._invalidate_workpoint_actions(self.step_team[j], self.step_workpoint[i])
+
+        # 释放工人
+        if step.dedicated:
+            # 专用团队
+            self.team_available[t] = self.team_sizes[t]
+        if self._uses_profile(i):
+            # 共用团队（及按最早开始时间调度的专用团队） - 从团队分配记录中移除
+            if i in self.team_allocations[t]:
+                workers = self.team_allocations[t].pop(i)
+                self.team_profiles[t].remove(
+                    self._start_times[i].item(), self._end_times[i].item(), workers
+                )
+
+        self._allocations[i] = 0  # 清零当前分配
+
     def get_makespan(self):
         """返回当前调度的完工时间（总时间）"""
-        if all(self.step_status[step["id"]] == 2 for step in self.work_steps):
+        if self._all_steps_completed():
             return self.current_time
         else:
             return float('inf')
 
     def get_schedule(self):
-        """返回多工作点调度信息用于可视化"""
-        schedule = []
-        for step in self.work_steps:
-            step_id = step["id"]
-            if self.step_status[step_id] == 2:  # Only include completed steps
-                schedule.append({
-                    "id": step_id,
-                    "name": step["display_name"],
-                    "original_name": step["original_name"],
-                    "workpoint_id": step["workpoint_id"],
-                    "workpoint_name": step["workpoint_name"],
-                    "team": step["team"],
-                    "start": self.step_start_times[step_id],
-                    "end": self.step_end_times[step_id],
-                    "workers": self.step_max_allocations[step_id],
-                    "order": step["order"]
-                })
-        return schedule
+        """
+        返回多工作点调度信息用于可视化
+
+        每个已完成工序一个普通字典（可直接pickle/JSON序列化），起止时间和人数按列一次取出。
+        """
+        completed = np.flatnonzero(self._status == 2)  # Only include completed steps
+        steps = self.work_steps
+        return [
+            {
+                "id": step.id,
+                "name": step.display_name,
+                "original_name": step.original_name,
+                "workpoint_id": step.workpoint_id,
+                "workpoint_name": step.workpoint_name,
+                "team": step.team,
+                "start": start,
+                "end": end,
+                "workers": workers,
+                "order": step.order
+            }
+            for step, start, end, workers in zip(
+                [steps[i] for i in completed.tolist()],
+                self._start_times[completed].tolist(),
+                self._end_times[completed].tolist(),
+                self._max_allocations[completed].tolist(),
+            )
+        ]
 
     def get_workpoint_summary(self):
         """获取各工作点的完成情况摘要"""
         summary = {}
-        for workpoint_id in self.workpoint_ids:
+        for k, workpoint_id in enumerate(self.workpoint_ids):
             workpoint_steps = self._get_workpoint_steps(workpoint_id)
             if workpoint_steps:
-                completed_steps = [step for step in workpoint_steps if self.step_status[step["id"]] == 2]
+                positions = [self.step_position[step.id] for step in workpoint_steps]
+                completed = self._status[positions] == 2
                 workpoint_makespan = 0
-                if completed_steps:
-                    workpoint_makespan = max(self.step_end_times[step["id"]] for step in completed_steps)
+                if completed.any():
+                    workpoint_makespan = self._end_times[positions][completed].max().item()
                 
                 summary[workpoint_id] = {
-                    "name": workpoint_steps[0]["workpoint_name"],
+                    "name": workpoint_steps[0].workpoint_name,
                     "total_steps": len(workpoint_steps),
-                    "completed_steps": len(completed_steps),
-                    "progress": len(completed_steps) / len(workpoint_steps),
+                    "completed_steps": int(self.workpoint_completed[k]),
+                    "progress": int(self.workpoint_completed[k]) / len(workpoint_steps),
                     "makespan": workpoint_makespan,
-                    "steps": [{"id": step["id"], "name": step["original_name"], 
-                             "status": self.step_status[step["id"]]} for step in workpoint_steps]
+                    "steps": [{"id": step.id, "name": step.original_name,
+                             "status": int(self._status[i])} for step, i in zip(workpoint_steps, positions)]
                 }
         
         return summary
 
 
+class VectorFactoryEnvironment:
+    """
+    同一调度问题的B个独立环境副本，按批次同步执行
+
+    副本通过FactoryEnvironment.clone()创建，共享工序定义等静态数据。
+    状态以(B, state_size)数组返回，便于策略网络一次前向计算整批动作。
+    已结束的副本在下一次reset()之前不再执行动作。
+    """
+
+    def __init__(self, workpoints_data=None, num_envs=1, env=None):
+        """
+        Args:
+            workpoints_data: 工作点数据字典（未提供env时用于创建环境）
+            num_envs: 副本数量B
+            env: 已创建的环境，作为第一个副本
+        """
+        if env is None:
+            env = FactoryEnvironment(workpoints_data)
+        self.envs = [env] + [env.clone() for _ in range(num_envs - 1)]
+        self.num_envs = num_envs
+        self.state_size = len(env._get_state(copy=False))
+
+        self._states = np.zeros((num_envs, self.state_size), dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+
+    def reset(self):
+        """重置所有副本，返回(B, state_size)初始状态"""
+        for b, env in enumerate(self.envs):
+            env.reset()
+            self._states[b] = env._get_state(copy=False)
+        self.dones[:] = False
+        return self._states.copy()
+
+    def get_valid_actions(self):
+        """返回每个副本的有效动作列表，已结束的副本为空列表"""
+        return [[] if done else env.get_valid_actions() for env, done in zip(self.envs, self.dones)]
+
+    def step(self, actions):
+        """
+        每个副本执行一个动作
+
+        Args:
+            actions: 长度为B的动作列表，已结束或无动作的副本传None
+
+        Returns:
+            (next_states, rewards, dones): (B, state_size)状态、(B,)奖励、(B,)是否完成
+        """
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        for b, (env, action) in enumerate(zip(self.envs, actions)):
+            if action is None or self.dones[b]:
+                continue
+            next_state, reward, done = env.step(action)
+            self._states[b] = next_state
+            rewards[b] = reward
+            self.dones[b] = done
+        return self._states.copy(), rewards, self.dones.copy()
+
+
 def create_sample_workpoints_data():
     """创建示例工作点数据"""
     return {
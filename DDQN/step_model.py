@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+工序模型模块 - 不可变的工序记录Step和按列存储的工序表StepTable
+
+Step使用__slots__保存单个工序实例，比每个工序一个字典节省内存；同时支持
+step["name"]、step.get("parallel")等只读字典式访问，供图表等沿用字典写法的代码使用。
+StepTable把所有工序按工序下标对齐成列（数值列为NumPy数组），供环境按下标或向量化读取。
+"""
+
+import numpy as np
+from id_interning import IdInterner
+
+
+# 标准模板缺少持续时间时使用的默认值（按模板顺序）
+DEFAULT_TEMPLATE_DURATIONS = [10, 5, 8, 6, 7, 9, 6, 7, 6, 7, 7, 7, 4, 7, 5]
+
+
+class Step:
+    """工序实例的不可变记录"""
+
+    __slots__ = (
+        "id", "name", "order", "team", "dedicated", "team_size", "duration", "parallel",
+        "workpoint_id", "workpoint_name", "original_name", "display_name",
+    )
+
+    def __init__(self, id, name, order, team, dedicated, team_size, duration, parallel,
+                 workpoint_id, workpoint_name, original_name, display_name):
+        setter = object.__setattr__
+        setter(self, "id", id)
+        setter(self, "name", name)
+        setter(self, "order", order)
+        setter(self, "team", team)
+        setter(self, "dedicated", dedicated)
+        setter(self, "team_size", team_size)
+        setter(self, "duration", duration)
+        setter(self, "parallel", parallel)
+        setter(self, "workpoint_id", workpoint_id)
+        setter(self, "workpoint_name", workpoint_name)
+        setter(self, "original_name", original_name)
+        setter(self, "display_name", display_name)
+
+    @classmethod
+    def from_template(cls, template, workpoint_id, workpoint_name, duration=None):
+        """
+        由工序模板（工作点数据中的工序字典）生成工序实例
+
+        Args:
+            template: 含name/order/team/dedicated/team_size/duration(/parallel)的字典
+            workpoint_id: 工作点ID
+            workpoint_name: 工作点名称
+            duration: 模板未给出duration时使用的持续时间
+        """
+        name = template["name"]
+
+        # 显示名称包含工作点编号（简化显示）
+        wp_number = workpoint_name.replace("工作点", "").strip()
+        if not wp_number:
+            wp_number = workpoint_id.split("_")[-1] if "_" in workpoint_id else workpoint_id
+
+        return cls(
+            id=f"{workpoint_id}_{name}",
+            name=name,
+            order=template["order"],
+            team=template["team"],
+            dedicated=template["dedicated"],
+            team_size=template["team_size"],
+            duration=template.get("duration", duration),
+            parallel=template.get("parallel", False),
+            workpoint_id=workpoint_id,
+            workpoint_name=workpoint_name,
+            original_name=name,
+            display_name=f"{wp_number}-{name}",
+        )
+
+    def __setattr__(self, key, value):
+        raise AttributeError("工序记录不可修改")
+
+    def __delattr__(self, key):
+        raise AttributeError("工序记录不可修改")
+
+    def __reduce__(self):
+        return (Step, tuple(getattr(self, field) for field in Step.__slots__))
+
+    # 只读字典式访问
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in Step.__slots__ else default
+
+    def __contains__(self, key):
+        return key in Step.__slots__
+
+    def keys(self):
+        return Step.__slots__
+
+    def to_dict(self):
+        """转换为普通字典"""
+        return {field: getattr(self, field) for field in Step.__slots__}
+
+    def __eq__(self, other):
+        if not isinstance(other, Step):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in Step.__slots__)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"Step(id={self.id!r}, team={self.team!r}, order={self.order}, duration={self.duration})"
+
+
+class StepTable:
+    """
+    按工序下标对齐的列式工序表
+
+    steps保存Step记录；order/duration/team_size/dedicated/parallel为NumPy数值列，
+    team/workpoint为团队和工作点下标列；ids为工序ID到下标的映射。
+    """
+
+    def __init__(self, steps, team_position, workpoint_position):
+        """
+        Args:
+            steps: Step列表，列表顺序即工序下标
+            team_position: 团队ID -> 团队下标（IdInterner）
+            workpoint_position: 工作点ID -> 工作点下标（IdInterner）
+        """
+        self.steps = list(steps)
+        self.ids = IdInterner(step.id for step in self.steps)
+        self.order = np.array([step.order for step in self.steps], dtype=np.int64)
+        self.duration = np.array([step.duration for step in self.steps], dtype=np.float64)
+        self.team_size = np.array([step.team_size for step in self.steps], dtype=np.int64)
+        self.dedicated = np.array([bool(step.dedicated) for step in self.steps], dtype=bool)
+        self.parallel = np.array([bool(step.parallel) for step in self.steps], dtype=bool)
+        self.team = np.array([team_position[step.team] for step in self.steps], dtype=np.int64)
+        self.workpoint = np.array([workpoint_position[step.workpoint_id] for step in self.steps], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, i):
+        return self.steps[i]
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def records(self, indices=None):
+        """返回工序的普通字典列表（默认全部工序），用于JSON、数据库等边界处"""
+        steps = self.steps if indices is None else [self.steps[i] for i in indices]
+        return [step.to_dict() for step in steps]
@@ -9,6 +9,7 @@ import numpy as np
 from io import BytesIO
 import os
 from config import TEAM_COLORS, TEAM_NAMES, VISUALIZATION_CONFIG, get_result_path, FILE_PATHS
+from run_metrics import phase
 
 
 def _set_time_axis(ax, makespan):
@@ -912,8 +913,13 @@ def _infer_workpoints_from_schedule(schedule):
     return workpoints
 
 
-def save_gantt_charts(schedule, makespan, env=None):
-    """保存所有甘特图到result文件夹"""
+def save_gantt_charts(schedule, makespan, env=None, metrics=None):
+    """
+    保存所有甘特图到result文件夹
+
+    Args:
+        metrics: 可选的RunMetrics，分别记录每张图的生成耗时
+    """
     from io import BytesIO
     
     saved_files = []
@@ -924,78 +930,81 @@ def save_gantt_charts(schedule, makespan, env=None):
     workpoint_fig = None
     team_fig = None
     
-    try:
-        # 1. 工序视角甘特图
-
-        # 生成工序甘特图作为对比
-        print("1/3 生成工序视角甘特图...")
-        record, process_fig = visualize_schedule(schedule, makespan)
-        process_path = get_result_path(FILE_PATHS["process_gantt"])
-        plt.savefig(process_path, dpi=VISUALIZATION_CONFIG["dpi"], 
-                bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
-        print(f"✅ 工序视角甘特图已保存为: {process_path}")
-        saved_files.append(FILE_PATHS["process_gantt"])
-        plt.close()
-
-        # print("1/3 生成工序视角甘特图...")
-        # process_fig = create_traditional_gantt_chart(schedule, makespan)
-        # process_path = get_result_path(FILE_PATHS["process_gantt"])
-        # process_fig.savefig(process_path, dpi=VISUALIZATION_CONFIG["dpi"], 
-        #                    bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
-        # print(f"✅ 工序视角甘特图已保存为: {process_path}")
-        # saved_files.append(FILE_PATHS["process_gantt"])
-        # plt.close(process_fig)
-        
-    except Exception as e:
-        print(f"❌ 工序视角甘特图生成失败: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    try:
-        # 2. 分层多工作点视角甘特图（解决并行任务重叠问题）
-        print("2/3 生成分层多工作点视角甘特图...")
-        workpoint_fig_obj = create_layered_workpoint_gantt_chart(schedule, makespan, env)
-        workpoint_path = get_result_path(FILE_PATHS["workpoint_gantt"])
-        workpoint_fig_obj.savefig(workpoint_path, dpi=VISUALIZATION_CONFIG["dpi"], 
-                                 bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
-        
-        # 转换为BytesIO对象供Flask使用
-        workpoint_fig = BytesIO()
-        workpoint_fig_obj.savefig(workpoint_fig, format='png', dpi=VISUALIZATION_CONFIG["dpi"], 
-                                 bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
-        workpoint_fig.seek(0)
-        
-        print(f"✅ 分层多工作点视角甘特图已保存为: {workpoint_path}")
-        saved_files.append(FILE_PATHS["workpoint_gantt"])
-        plt.close(workpoint_fig_obj)
-        
-    except Exception as e:
-        print(f"❌ 多工作点视角甘特图生成失败: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    try:
-        # 3. 分层团队视角甘特图（解决并行任务重叠问题）
-        print("3/3 生成分层团队视角甘特图...")
-        team_fig_obj = create_layered_team_gantt_chart(schedule, makespan)
-        team_path = get_result_path(FILE_PATHS["team_gantt"])
-        team_fig_obj.savefig(team_path, dpi=VISUALIZATION_CONFIG["dpi"], 
-                            bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
-        
-        # 转换为BytesIO对象供Flask使用
-        team_fig = BytesIO()
-        team_fig_obj.savefig(team_fig, format='png', dpi=VISUALIZATION_CONFIG["dpi"], 
-                            bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
-        team_fig.seek(0)
-        
-        print(f"✅ 分层团队视角甘特图已保存为: {team_path}")
-        saved_files.append(FILE_PATHS["team_gantt"])
-        plt.close(team_fig_obj)
-        
-    except Exception as e:
-        print(f"❌ 团队视角甘特图生成失败: {e}")
-        import traceback
-        traceback.print_exc()
+    with phase(metrics, "chart_process_gantt"):
+        try:
+            # 1. 工序视角甘特图
+
+            # 生成工序甘特图作为对比
+            print("1/3 生成工序视角甘特图...")
+            record, process_fig = visualize_schedule(schedule, makespan)
+            process_path = get_result_path(FILE_PATHS["process_gantt"])
+            plt.savefig(process_path, dpi=VISUALIZATION_CONFIG["dpi"], 
+                    bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
+            print(f"✅ 工序视角甘特图已保存为: {process_path}")
+            saved_files.append(FILE_PATHS["process_gantt"])
+            plt.close()
+
+            # print("1/3 生成工序视角甘特图...")
+            # process_fig = create_traditional_gantt_chart(schedule, makespan)
+            # process_path = get_result_path(FILE_PATHS["process_gantt"])
+            # process_fig.savefig(process_path, dpi=VISUALIZATION_CONFIG["dpi"], 
+            #                    bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
+            # print(f"✅ 工序视角甘特图已保存为: {process_path}")
+            # saved_files.append(FILE_PATHS["process_gantt"])
+            # plt.close(process_fig)
+        
+        except Exception as e:
+            print(f"❌ 工序视角甘特图生成失败: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    with phase(metrics, "chart_workpoint_gantt"):
+        try:
+            # 2. 分层多工作点视角甘特图（解决并行任务重叠问题）
+            print("2/3 生成分层多工作点视角甘特图...")
+            workpoint_fig_obj = create_layered_workpoint_gantt_chart(schedule, makespan, env)
+            workpoint_path = get_result_path(FILE_PATHS["workpoint_gantt"])
+            workpoint_fig_obj.savefig(workpoint_path, dpi=VISUALIZATION_CONFIG["dpi"], 
+                                     bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
+        
+            # 转换为BytesIO对象供Flask使用
+            workpoint_fig = BytesIO()
+            workpoint_fig_obj.savefig(workpoint_fig, format='png', dpi=VISUALIZATION_CONFIG["dpi"], 
+                                     bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
+            workpoint_fig.seek(0)
+        
+            print(f"✅ 分层多工作点视角甘特图已保存为: {workpoint_path}")
+            saved_files.append(FILE_PATHS["workpoint_gantt"])
+            plt.close(workpoint_fig_obj)
+        
+        except Exception as e:
+            print(f"❌ 多工作点视角甘特图生成失败: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    with phase(metrics, "chart_team_gantt"):
+        try:
+            # 3. 分层团队视角甘特图（解决并行任务重叠问题）
+            print("3/3 生成分层团队视角甘特图...")
+            team_fig_obj = create_layered_team_gantt_chart(schedule, makespan)
+            team_path = get_result_path(FILE_PATHS["team_gantt"])
+            team_fig_obj.savefig(team_path, dpi=VISUALIZATION_CONFIG["dpi"], 
+                                bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
+        
+            # 转换为BytesIO对象供Flask使用
+            team_fig = BytesIO()
+            team_fig_obj.savefig(team_fig, format='png', dpi=VISUALIZATION_CONFIG["dpi"], 
+                                bbox_inches=VISUALIZATION_CONFIG["bbox_inches"])
+            team_fig.seek(0)
+        
+            print(f"✅ 分层团队视角甘特图已保存为: {team_path}")
+            saved_files.append(FILE_PATHS["team_gantt"])
+            plt.close(team_fig_obj)
+        
+        except Exception as e:
+            print(f"❌ 团队视角甘特图生成失败: {e}")
+            import traceback
+            traceback.print_exc()
     
     if saved_files:
         print(f"\n📊 三张图表统计:")
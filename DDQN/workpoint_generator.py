@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+工作点数据生成模块 - 按随机种子生成大规模的合成工作点数据，用于压力测试
+
+生成的数据与create_sample_workpoints_data / 数据库读取结果格式相同:
+    {workpoint_id: {"name": 名称, "steps": [{"name", "order", "team", "dedicated",
+                                              "team_size", "duration", "parallel"}, ...]}}
+工序组合取自STANDARD_STEP_TEMPLATES。数据可以逐个工作点写入数据库的process_*表，
+也可以流式写入JSON文件，不需要在内存中保存全部工作点。
+
+用法:
+    python workpoint_generator.py 500 --output workpoints_500.json
+    python workpoint_generator.py 500 --seed 7 --db        # 写入数据库process_*表
+"""
+
+import argparse
+import json
+import random
+
+from config import STANDARD_STEP_TEMPLATES
+from step_model import DEFAULT_TEMPLATE_DURATIONS
+
+
+# 每个工作点都包含的工序，其余工序按概率出现
+DEFAULT_MANDATORY_STEPS = ("搭架子", "合格报告出具")
+
+# 持续时间分布：type为uniform_int/uniform/normal/lognormal/template
+#   uniform_int: 整数均匀分布[low, high]          uniform: 实数均匀分布[low, high]
+#   normal: 均值mean、标准差std                   lognormal: 对数均值mu、对数标准差sigma
+#   template: 标准模板默认时长乘以[1 - spread, 1 + spread]内的随机系数
+DEFAULT_DURATION_DISTRIBUTION = {"type": "template", "spread": 0.3}
+
+MIN_DURATION = 1.0  # 采样结果的下限
+
+
+def sample_duration(rng, distribution, template_index):
+    """
+    按分布采样一个工序的持续时间
+
+    Args:
+        rng: random.Random实例
+        distribution: 持续时间分布字典（见DEFAULT_DURATION_DISTRIBUTION）
+        template_index: 工序在STANDARD_STEP_TEMPLATES中的下标（template分布使用）
+    """
+    kind = distribution["type"]
+    if kind == "uniform_int":
+        return rng.randint(distribution["low"], distribution["high"])
+    if kind == "uniform":
+        value = rng.uniform(distribution["low"], distribution["high"])
+    elif kind == "normal":
+        value = rng.gauss(distribution["mean"], distribution["std"])
+    elif kind == "lognormal":
+        value = rng.lognormvariate(distribution["mu"], distribution["sigma"])
+    elif kind == "template":
+        spread = distribution.get("spread", 0.0)
+        value = DEFAULT_TEMPLATE_DURATIONS[template_index] * rng.uniform(1 - spread, 1 + spread)
+    else:
+        raise ValueError(f"未知的持续时间分布 {kind}")
+    # 与数据库DECIMAL(10, 2)列的精度一致
+    return round(max(MIN_DURATION, value), 2)
+
+
+def iter_workpoints(num_workpoints, seed=0, step_probability=0.6, mandatory_steps=DEFAULT_MANDATORY_STEPS,
+                    duration_distribution=None, team_sizes=None, start_index=1):
+    """
+    逐个生成工作点数据
+
+    Args:
+        num_workpoints: 工作点数量
+        seed: 随机种子，相同参数和种子生成相同的数据
+        step_probability: 非必选工序出现的概率，可以是数值或 {工序名称: 概率} 字典
+            （字典中未列出的工序使用0.6）
+        mandatory_steps: 每个工作点都包含的工序名称
+        duration_distribution: 持续时间分布（默认DEFAULT_DURATION_DISTRIBUTION）
+        team_sizes: {团队: 人数}，覆盖工序模板中的team_size（影响实际耗时的计算）
+        start_index: 第一个工作点的编号
+
+    Yields:
+        (workpoint_id, {"name": ..., "steps": [...]})
+    """
+    rng = random.Random(seed)
+    if duration_distribution is None:
+        duration_distribution = DEFAULT_DURATION_DISTRIBUTION
+    team_sizes = team_sizes or {}
+
+    for number in range(start_index, start_index + num_workpoints):
+        steps = []
+        for template_index, template in enumerate(STANDARD_STEP_TEMPLATES):
+            if template["name"] not in mandatory_steps:
+                if isinstance(step_probability, dict):
+                    probability = step_probability.get(template["name"], 0.6)
+                else:
+                    probability = step_probability
+                if rng.random() >= probability:
+                    continue
+            step = dict(template)
+            step["team_size"] = team_sizes.get(template["team"], template["team_size"])
+            step["duration"] = sample_duration(rng, duration_distribution, template_index)
+            step.setdefault("parallel", False)
+            steps.append(step)
+        yield f"workpoint_{number}", {"name": f"工作点{number}", "steps": steps}
+
+
+def generate_workpoints_data(num_workpoints, seed=0, **options):
+    """生成完整的工作点数据字典（参数同iter_workpoints）"""
+    return dict(iter_workpoints(num_workpoints, seed, **options))
+
+
+def write_workpoints_file(path, num_workpoints, seed=0, **options):
+    """
+    把生成的工作点数据逐个写入JSON文件（参数同iter_workpoints）
+
+    Returns:
+        写入的工序总数
+    """
+    num_steps = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        for k, (workpoint_id, workpoint_info) in enumerate(iter_workpoints(num_workpoints, seed, **options)):
+            if k:
+                f.write(",\n")
+            f.write(f"{json.dumps(workpoint_id)}: {json.dumps(workpoint_info, ensure_ascii=False)}")
+            num_steps += len(workpoint_info["steps"])
+        f.write("\n}\n")
+    print(f"✅ 已生成 {num_workpoints} 个工作点, {num_steps} 个工序 -> {path}")
+    return num_steps
+
+
+def load_workpoints_file(path):
+    """读取write_workpoints_file写出的工作点数据"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def stream_to_database(db, num_workpoints, seed=0, clear_existing=True, **options):
+    """
+    把生成的工作点逐个写入数据库的process_*表（参数同iter_workpoints）
+
+    Args:
+        db: 已创建的DatabaseConnector
+        clear_existing: 写入前是否清空同名表中的已有数据
+
+    Returns:
+        bool: 是否全部写入成功
+    """
+    success_count = 0
+    for workpoint_id, workpoint_info in iter_workpoints(num_workpoints, seed, **options):
+        workpoint_name = workpoint_info["name"]
+        if not db.create_process_table(workpoint_id, workpoint_name):
+            continue
+        if clear_existing and not db.clear_process_table(workpoint_id):
+            print(f"⚠️  {workpoint_name} 清空数据失败，继续插入")
+        if db.save_processes(workpoint_id, workpoint_name, workpoint_info["steps"]):
+            success_count += 1
+
+    print(f"✅ 合成工作点写入完成: {success_count}/{num_workpoints} 个工作点成功")
+    return success_count == num_workpoints
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成合成工作点数据")
+    parser.add_argument("workpoints", type=int, help="工作点数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--step-probability", type=float, default=0.6, help="非必选工序出现的概率")
+    parser.add_argument("--duration", default=None,
+                        help='持续时间分布JSON，如 \'{"type": "uniform_int", "low": 3, "high": 12}\'')
+    parser.add_argument("--team-sizes", default=None, help='团队人数JSON，如 \'{"team2": 12}\'')
+    parser.add_argument("--output", default=None, help="写入的JSON文件路径")
+    parser.add_argument("--db", action="store_true", help="写入数据库的process_*表")
+    args = parser.parse_args(argv)
+    if not args.output and not args.db:
+        parser.error("请指定 --output 或 --db")
+
+    options = {
+        "step_probability": args.step_probability,
+        "duration_distribution": json.loads(args.duration) if args.duration else None,
+        "team_sizes": json.loads(args.team_sizes) if args.team_sizes else None,
+    }
+
+    if args.output:
+        write_workpoints_file(args.output, args.workpoints, args.seed, **options)
+
+    if args.db:
+        from db_connector import DatabaseConnector
+        db = DatabaseConnector(
+            host="localhost",
+            user="root",
+            password="123456",
+            database="secret"
+        )
+        if db.connect():
+            stream_to_database(db, args.workpoints, args.seed, **options)
+            db.close()
+
+
+if __name__ == "__main__":
+    main()